@@ -1,20 +1,40 @@
 from .tools import (
     read_file, 
+    read_preview,
+    is_binary_file,
     write_file, 
     list_files, 
+    workspace_outline,
     load_mind_files,
     update_memory,
     reset_project_memory,
-    run_command
+    run_command,
+    run_command_detailed,
+    execute,
+    find_test_files,
+    exit_code_of,
+    get_workspace_root,
+    get_mind_root,
+    use_workspace
 )
 
 __all__ = [
     "AgentState", 
     "read_file", 
+    "read_preview",
+    "is_binary_file",
     "write_file", 
     "list_files",
+    "workspace_outline",
     "load_mind_files",
     "update_memory",
     "reset_project_memory",
-    "run_command"
+    "run_command",
+    "run_command_detailed",
+    "execute",
+    "find_test_files",
+    "exit_code_of",
+    "get_workspace_root",
+    "get_mind_root",
+    "use_workspace"
 ]
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Launcher used by agent.tools.execute on POSIX: applies the rlimits passed as JSON to
+itself, then execs /bin/sh -c <command> (same pid, so the limits and process group carry over).
+Runs under `python -I -S`, so it must not import anything from the agent package.
+"""
+import json
+import os
+import resource
+import sys
+
+def apply_limits(limits: dict):
+    for name, value in limits.items():
+        limit = getattr(resource, name, None)
+        if limit is None or not value:
+            continue
+        _, hard = resource.getrlimit(limit)
+        # CPU: soft limit sends SIGXCPU, the hard one a second later kills
+        soft_value = value
+        hard_value = value + 1 if name == "RLIMIT_CPU" else value
+        if hard != resource.RLIM_INFINITY:
+            soft_value, hard_value = min(soft_value, hard), min(hard_value, hard)
+        try:
+            resource.setrlimit(limit, (soft_value, hard_value))
+        except (ValueError, OSError):
+            pass  # Not allowed on this host; run with what we have
+
+if __name__ == "__main__":
+    apply_limits(json.loads(sys.argv[1]))
+    os.execv("/bin/sh", ["/bin/sh", "-c", sys.argv[2]])
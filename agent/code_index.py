@@ -0,0 +1,135 @@
+"""
+AST-based outline of the Python code in a workspace.
+Gives the Architect and Coder the structure of existing modules (imports, classes,
+function signatures) without pasting whole files. Kept up to date incrementally:
+write_file pushes new content in, and anything else is re-parsed when its mtime changes.
+"""
+import ast
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+def _signature(node: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+def summarize_module(source: str) -> list[str]:
+    """Outline lines for one module: imports, then top-level classes/functions."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return [f"  (syntax error: line {e.lineno})"]
+
+    imports, body = [], []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            names = ", ".join(alias.name for alias in node.names)
+            imports.append(f"{module}: {names}")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            body.append(f"  {_signature(node)}")
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            body.append(f"  class {node.name}({bases})" if bases else f"  class {node.name}")
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    body.append(f"    {_signature(item)}")
+
+    lines = [f"  imports: {'; '.join(imports)}"] if imports else []
+    return lines + body
+
+class CodeIndex:
+    """Outline cache for one workspace root, keyed by file path + (mtime, size)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._entries: dict[str, tuple[tuple, list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _version(self, rel: str) -> tuple | None:
+        try:
+            stat = (self.root / rel).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def update_file(self, rel: str, content: str):
+        """Called after write_file so the index never re-reads what it was just handed."""
+        entry = (self._version(rel), summarize_module(content))
+        with self._lock:
+            self._entries[rel] = entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def refresh(self) -> list[str]:
+        """Re-parses changed .py files, drops deleted ones. Returns every file in the workspace."""
+        if not self.root.exists():
+            self.clear()
+            return []
+        files = sorted(str(p.relative_to(self.root)) for p in self.root.rglob("*") if p.is_file())
+        python_files = {f for f in files if f.endswith(".py")}
+
+        with self._lock:
+            for rel in list(self._entries):
+                if rel not in python_files:
+                    del self._entries[rel]
+            stale = [rel for rel in python_files
+                     if rel not in self._entries or self._entries[rel][0] != self._version(rel)]
+
+        for rel in stale:
+            try:
+                source = (self.root / rel).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                continue
+            self.update_file(rel, source)
+        return files
+
+    def outline(self, budget_tokens: int) -> str:
+        """Compact outline within ~budget_tokens (4 chars/token); the rest is listed by count."""
+        files = self.refresh()
+        if not files:
+            return "(No files yet)"
+
+        with self._lock:
+            entries = {rel: lines for rel, (_, lines) in self._entries.items()}
+
+        budget_chars = budget_tokens * 4
+        out, used, omitted = [], 0, 0
+        # Python modules with structure first, then everything else by name
+        ordered = [f for f in files if f in entries] + [f for f in files if f not in entries]
+        for rel in ordered:
+            block = "\n".join([rel] + entries.get(rel, []))
+            if used + len(block) > budget_chars:
+                if used + len(rel) <= budget_chars:
+                    out.append(rel)  # Name only, no room for its structure
+                    used += len(rel) + 1
+                else:
+                    omitted += 1
+                continue
+            out.append(block)
+            used += len(block) + 1
+
+        if omitted:
+            out.append(f"(+{omitted} more file(s) not shown)")
+        return "\n".join(out)
+
+_indexes: "OrderedDict[str, CodeIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_MAX_INDEXES = 16  # batch runs and scratch candidates each have their own root
+
+def index_for(root: Path) -> CodeIndex:
+    """The (shared) index for a workspace root."""
+    key = str(Path(root).resolve())
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+        else:
+            _indexes[key] = CodeIndex(root)
+            if len(_indexes) > _MAX_INDEXES:
+                _indexes.popitem(last=False)
+        return _indexes[key]
@@ -0,0 +1,100 @@
+"""
+Runtime switches for the agent graph.
+Everything here can be overridden from the environment (or .env).
+"""
+import os
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(name, default).strip().lower()
+
+# Speculative triage: run the Optimizer (and optionally the Architect) alongside the Bouncer.
+#   "off"       -> bouncer -> optimizer -> architect, strictly in sequence
+#   "optimizer" -> bouncer || optimizer
+#   "architect" -> bouncer || (optimizer -> architect)
+SPECULATIVE_MODES = ("off", "optimizer", "architect")
+SPECULATIVE_MODE = _env("AGENT_SPECULATIVE", "off")
+
+# Parallel candidates in the Coder: generate N implementations at once, test each in a
+# scratch copy of the workspace and promote a passing one. 1 = classic single attempt.
+CODER_CANDIDATES = max(1, int(os.getenv("AGENT_CODER_CANDIDATES", "1")))
+#   "first" -> promote the first candidate whose tests pass
+#   "best"  -> wait for all candidates, promote the one with the fewest failing tests
+CANDIDATE_SELECTION = _env("AGENT_CANDIDATE_SELECTION", "first")
+# Candidates need some temperature, otherwise they are all the same answer
+CANDIDATE_TEMPERATURE = float(os.getenv("AGENT_CANDIDATE_TEMPERATURE", "0.7"))
+
+# Plan fan-out: independent structured plan steps are sent to parallel Coder workers
+# and joined before the Debugger. Off = one Coder implements the whole plan.
+PLAN_FANOUT = _env("AGENT_PLAN_FANOUT", "off") in ("1", "true", "on", "yes")
+
+# Dev loop budget: starts at MAX_ITERATIONS, grows (up to MAX_ITERATIONS_CAP) while the
+# failures keep shrinking, and stops early once the Coder keeps repeating the same failure.
+MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", "5"))
+MAX_ITERATIONS_CAP = max(MAX_ITERATIONS, int(os.getenv("AGENT_MAX_ITERATIONS_CAP", "8")))
+
+# Client-side model call scheduler (shared by every node and session in this process).
+# Keep these at or just under the provider's limits for your API key.
+MODEL_REQUESTS_PER_MINUTE = float(os.getenv("AGENT_MODEL_RPM", "50"))
+MODEL_TOKENS_PER_MINUTE = float(os.getenv("AGENT_MODEL_TPM", "50000"))
+MODEL_MAX_CONCURRENCY = max(1, int(os.getenv("AGENT_MODEL_MAX_CONCURRENCY", "8")))
+MODEL_MAX_RETRIES = max(0, int(os.getenv("AGENT_MODEL_MAX_RETRIES", "4")))
+MODEL_RETRY_BASE_DELAY = float(os.getenv("AGENT_MODEL_RETRY_BASE_DELAY", "1.0"))
+MODEL_RETRY_MAX_DELAY = float(os.getenv("AGENT_MODEL_RETRY_MAX_DELAY", "30.0"))
+
+# Token budget for the project context (manifest + memory) the Optimizer builds and
+# passes on to the router call and the Architect. Oldest history is dropped first.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKENS", "1500"))
+
+# Token budget for the workspace outline (modules, classes, function signatures) shown to
+# the Architect and the Coder in place of the flat file list.
+CODE_OUTLINE_TOKENS = int(os.getenv("AGENT_CODE_OUTLINE_TOKENS", "1500"))
+
+# run_command: wall-clock limit and how much of each output stream is kept
+# (first HEAD + last TAIL bytes; the middle is dropped and only counted).
+RUN_TIMEOUT_SECONDS = float(os.getenv("AGENT_RUN_TIMEOUT", "10"))
+RUN_OUTPUT_HEAD_BYTES = int(os.getenv("AGENT_RUN_OUTPUT_HEAD_BYTES", "16384"))
+RUN_OUTPUT_TAIL_BYTES = int(os.getenv("AGENT_RUN_OUTPUT_TAIL_BYTES", "16384"))
+
+# read_file: decoded text is cached (by mtime + size) up to this many bytes in total.
+# read_preview: per-file cap when workspace files are pasted into prompts.
+READ_CACHE_BYTES = int(float(os.getenv("AGENT_READ_CACHE_MB", "32")) * 1024 * 1024)
+READ_PREVIEW_BYTES = int(os.getenv("AGENT_READ_PREVIEW_BYTES", "8192"))
+
+# Sandbox for generated code (POSIX only; ignored elsewhere). Per-run rlimits, 0 = no limit.
+# Note: RLIMIT_NPROC counts every process of the user running the agent, not just this run.
+SANDBOX_CPU_SECONDS = int(os.getenv("AGENT_SANDBOX_CPU_SECONDS", "30"))
+SANDBOX_MEMORY_MB = int(os.getenv("AGENT_SANDBOX_MEMORY_MB", "2048"))
+SANDBOX_MAX_OPEN_FILES = int(os.getenv("AGENT_SANDBOX_MAX_OPEN_FILES", "256"))
+# RLIMIT_NPROC counts every process/thread the *user* owns, not just this run, so it is
+# opt-in and means headroom: how many more the command may start beyond what the user
+# already runs (Linux only; 0 = no process limit)
+SANDBOX_MAX_PROCESSES = int(os.getenv("AGENT_SANDBOX_MAX_PROCESSES", "0"))
+# How many sandboxed commands may run at once across every session in this process
+SANDBOX_MAX_CONCURRENT = max(1, int(os.getenv("AGENT_SANDBOX_MAX_CONCURRENT", str(os.cpu_count() or 2))))
+
+# Whole-run memoization: an identical request against an identical workspace + mind
+# replays the stored file changes instead of re-running the graph.
+RUN_CACHE_ENABLED = _env("AGENT_RUN_CACHE", "on") in ("1", "true", "on", "yes")
+RUN_CACHE_DIR = os.getenv(
+    "AGENT_RUN_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "runs")
+)
+
+# Debugger pre-check for undefined names, broken workspace imports and duplicate
+# definitions. Findings go straight back to the Coder without running tests.
+STATIC_CHECK = _env("AGENT_STATIC_CHECK", "on") in ("1", "true", "on", "yes")
+
+# Job-queue HTTP service (server.py). Jobs + events persist in JOBS_DB; named
+# workspaces live under SERVICE_WORKSPACES_DIR/<name>/{workspace,mind}.
+SERVICE_HOST = os.getenv("AGENT_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("AGENT_SERVICE_PORT", "8765"))
+SERVICE_WORKERS = max(1, int(os.getenv("AGENT_SERVICE_WORKERS", "2")))
+SERVICE_URL = os.getenv("AGENT_SERVICE_URL", f"http://{SERVICE_HOST}:{SERVICE_PORT}")
+JOBS_DB = os.getenv(
+    "AGENT_JOBS_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "jobs.sqlite3")
+)
+SERVICE_WORKSPACES_DIR = os.getenv(
+    "AGENT_SERVICE_WORKSPACES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workspaces")
+)
@@ -0,0 +1,87 @@
+"""
+Builds the compact project context (manifest + memory) shared by the Optimizer's
+router call and the Architect. Serialization is compact, history is trimmed to a
+token budget (most recent entries win), and the result is cached per mind-file version.
+"""
+import json
+import threading
+from agent import config
+from agent.tools import get_mind_root, load_mind_files
+
+# History lists trimmed oldest-first when the context is over budget
+TRIMMABLE = ("error_log", "completed_tasks")
+
+_cache: dict[tuple, str] = {}
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 32
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; good enough for budgeting."""
+    return len(text) // 4
+
+def _compact(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def _render(manifest: dict, memory: dict) -> str:
+    return (
+        "PROJECT MANIFEST (Rules & Stack):\n" + _compact(manifest) +
+        "\n\nPROJECT MEMORY (Current State):\n" + _compact(memory)
+    )
+
+def _fit(manifest: dict, memory: dict, budget: int) -> str:
+    """Drops the oldest history (then known_files) until the rendered context fits."""
+    memory = {k: (list(v) if isinstance(v, list) else v) for k, v in memory.items()}
+    omitted = {}
+
+    def render():
+        shown = dict(memory, omitted=omitted) if omitted else memory
+        return _render(manifest, shown)
+
+    text = render()
+    while estimate_tokens(text) > budget:
+        # Trim whichever history list is currently longest, oldest entry first
+        candidates = [k for k in TRIMMABLE if isinstance(memory.get(k), list) and memory[k]]
+        if not candidates:
+            break
+        key = max(candidates, key=lambda k: len(_compact(memory[k])))
+        memory[key].pop(0)
+        omitted[key] = omitted.get(key, 0) + 1
+        text = render()
+
+    files = memory.get("known_files")
+    while estimate_tokens(text) > budget and isinstance(files, list) and files:
+        files.pop()
+        omitted["known_files"] = omitted.get("known_files", 0) + 1
+        text = render()
+    return text
+
+def _version(path) -> tuple | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def build_context(budget: int | None = None) -> str:
+    """Compact, budgeted context for the current mind folder (cached until the files change)."""
+    budget = budget or config.CONTEXT_TOKEN_BUDGET
+    mind_root = get_mind_root()
+    key = (
+        str(mind_root),
+        _version(mind_root / "manifest.json"),
+        _version(mind_root / "memory.json"),
+        budget
+    )
+
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+
+    manifest, memory = load_mind_files()
+    text = _fit(manifest, memory, budget)
+
+    with _cache_lock:
+        if len(_cache) >= _CACHE_SIZE:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = text
+    return text
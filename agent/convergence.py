@@ -0,0 +1,72 @@
+"""
+Progress tracking for the dev loop.
+Each Debugger rejection gets a fingerprint (normalized failure + touched files) and a
+failure score, so repeated or oscillating failures can be told apart from real progress.
+"""
+import hashlib
+import re
+
+# Noise that changes between runs without the failure actually changing
+_NOISE = [
+    (re.compile(r'File "[^"]*[\\/]([^"\\/]+)"'), r'File "\1"'),  # absolute paths -> basename
+    (re.compile(r"line \d+"), "line N"),
+    (re.compile(r"0x[0-9a-fA-F]+"), "0xADDR"),
+    (re.compile(r"\d+\.\d+s\b"), "Ts"),                          # "Ran 3 tests in 0.002s"
+    (re.compile(r"\s+"), " "),
+]
+
+# Per-run measurements from tools.format_result (timings, byte counts, CPU, peak RSS)
+# differ between identical runs, so they never take part in a fingerprint
+_RUN_STATS = re.compile(r"^(?:ELAPSED|RESOURCES): .*\n?", re.MULTILINE)
+
+_EXCEPTION_LINE = re.compile(r"^(\w+(?:\.\w+)*(?:Error|Exception|Exit|Interrupt)\b.*)$", re.MULTILINE)
+_FAILING_TEST = re.compile(r"^(?:FAIL|ERROR): (\S+)", re.MULTILINE)
+_UNITTEST_TOTALS = re.compile(r"FAILED \(([^)]*)\)")
+
+def normalize(text: str) -> str:
+    for pattern, replacement in _NOISE:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+def failing_tests(output: str) -> list[str]:
+    """unittest-style "FAIL: test_x" / "ERROR: test_x" names."""
+    return sorted(set(_FAILING_TEST.findall(output)))
+
+def failure_score(output: str) -> int:
+    """Rough count of distinct failures in a Debugger run (lower is better)."""
+    totals = _UNITTEST_TOTALS.findall(output)
+    if totals:
+        return sum(int(n) for part in totals for n in re.findall(r"=(\d+)", part))
+    exit_codes = re.findall(r"EXIT CODE: (-?\d+)", output)
+    failed_runs = sum(1 for code in exit_codes if code != "0")
+    if failed_runs:
+        return failed_runs
+    return max(1, len(_EXCEPTION_LINE.findall(output)))
+
+def fingerprint(output: str, touched: list[str]) -> str:
+    """Stable id for "the same failure": exception lines + failing tests + touched files."""
+    output = _RUN_STATS.sub("", output)
+    signature = _EXCEPTION_LINE.findall(output) or [output[-500:]]
+    parts = [normalize(line) for line in signature] + failing_tests(output) + sorted(touched)
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+def assess_progress(history: list[dict]) -> str:
+    """
+    Looks at the fingerprinted Debugger entries in `history`:
+      "stalled"     -> the last two failures are identical
+      "oscillating" -> alternating between two failures (A, B, A, B)
+      "improving"   -> failure score strictly dropped in each of the last two rounds
+                       (one lower round may just be noise)
+      "unknown"     -> not enough signal yet
+    """
+    rounds = [e for e in history if e.get("role") == "debugger" and e.get("fingerprint")]
+    prints = [e["fingerprint"] for e in rounds]
+    scores = [e.get("score") for e in rounds]
+
+    if len(prints) >= 2 and prints[-1] == prints[-2]:
+        return "stalled"
+    if len(prints) >= 4 and prints[-1] == prints[-3] and prints[-2] == prints[-4]:
+        return "oscillating"
+    if len(scores) >= 3 and None not in scores[-3:] and scores[-1] < scores[-2] < scores[-3]:
+        return "improving"
+    return "unknown"
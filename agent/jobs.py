@@ -0,0 +1,238 @@
+"""
+Persistent job queue for the HTTP service (see server.py).
+
+Jobs and their node events live in SQLite, so queued work and finished results survive
+a restart. A pool of worker threads claims queued jobs and runs each through the graph.
+Only one job runs per workspace at a time, because jobs sharing a workspace would
+overwrite each other's files.
+"""
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from agent import config
+from agent.run_cache import cached_run
+from agent.scheduler import INTERACTIVE, use_priority
+from agent.tools import MIND_ROOT, WORKSPACE_ROOT, reset_project_memory, use_workspace
+
+TERMINAL = ("done", "error")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    request TEXT NOT NULL,
+    workspace TEXT NOT NULL,
+    no_cache INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    cache TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    node TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+def _dumps(value) -> str:
+    # Graph updates can hold LangChain messages; anything not JSON-native becomes a string
+    return json.dumps(value, default=str)
+
+class JobStore:
+    """SQLite-backed jobs + events. Safe to share between threads."""
+
+    def __init__(self, path: str | Path = config.JOBS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # Notified on every new event / status change (workers and event streams wait on it)
+        self.changed = threading.Condition(self._lock)
+        self.version = 0  # Bumped with every notification, so waiters can't miss one
+
+    def _notify(self):
+        self.version += 1
+        self.changed.notify_all()
+
+    def recover(self) -> int:
+        """Requeues jobs left "running" by a previous process. Returns how many."""
+        with self._lock:
+            cursor = self._db.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+            self._db.execute("DELETE FROM events WHERE job_id IN (SELECT id FROM jobs WHERE status = 'queued')")
+            return cursor.rowcount
+
+    def submit(self, request: str, workspace: str = "", no_cache: bool = False) -> dict:
+        job_id = uuid.uuid4().hex[:12]
+        with self.changed:
+            self._db.execute(
+                "INSERT INTO jobs (id, request, workspace, no_cache, status, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, request, workspace, int(no_cache), time.time())
+            )
+            self._notify()
+        return self.get(job_id)
+
+    def claim(self, busy_workspaces: set[str]) -> dict | None:
+        """Oldest queued job whose workspace is free, marked running. Call with `changed` held."""
+        rows = self._db.execute("SELECT id, workspace FROM jobs WHERE status = 'queued' ORDER BY created").fetchall()
+        for row in rows:
+            if row["workspace"] in busy_workspaces:
+                continue
+            self._db.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row["id"]))
+            return self._row(row["id"])
+        return None
+
+    def add_event(self, job_id: str, node: str, data: dict):
+        with self.changed:
+            seq = self._db.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._db.execute(
+                "INSERT INTO events (job_id, seq, ts, node, data) VALUES (?, ?, ?, ?, ?)",
+                (job_id, seq, time.time(), node, _dumps(data))
+            )
+            self._notify()
+
+    def finish(self, job_id: str, status: str, result: dict | None = None,
+               error: str | None = None, cache: str | None = None):
+        with self.changed:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ?, cache = ? WHERE id = ?",
+                (status, time.time(), _dumps(result) if result is not None else None, error, cache, job_id)
+            )
+            self._notify()
+
+    def _row(self, job_id: str) -> dict | None:
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["no_cache"] = bool(job["no_cache"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if job["status"] == "queued":
+            job["position"] = self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created < ?", (job["created"],)
+            ).fetchone()[0]
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            return self._row(job_id)
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, request, workspace, status, created, started, finished, cache "
+                "FROM jobs ORDER BY created DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def events(self, job_id: str, after: int = 0) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, ts, node, data FROM events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [{"seq": r["seq"], "ts": r["ts"], "node": r["node"], "update": json.loads(r["data"])} for r in rows]
+
+    def wait(self, seen_version: int, timeout: float) -> int:
+        """Blocks until something changed after `seen_version` (or `timeout` passes); returns the new version."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != seen_version, timeout)
+            return self.version
+
+def workspace_dirs(name: str) -> tuple[Path, Path]:
+    """(workspace, mind) for a job. "" is the default workspace the CLI and UI use."""
+    if not name:
+        return WORKSPACE_ROOT, MIND_ROOT
+    base = Path(config.SERVICE_WORKSPACES_DIR) / name
+    return base / "workspace", base / "mind"
+
+class JobRunner:
+    """
+    A pool of worker threads draining the job queue through `graph`.
+    `initial_state(request)` builds the graph input (main.new_run_state).
+    """
+
+    def __init__(self, graph, store: JobStore, initial_state, workers: int = config.SERVICE_WORKERS):
+        self.graph = graph
+        self.store = store
+        self.initial_state = initial_state
+        self.workers = max(1, workers)
+        self._busy: set[str] = set()  # Workspaces with a running job (guarded by store.changed)
+        self._stopping = False
+        self._threads = []
+
+    def start(self):
+        recovered = self.store.recover()
+        if recovered:
+            print(f"   > ♻️ Requeued {recovered} job(s) interrupted by the last shutdown")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None):
+        """Stops claiming new jobs and waits for running ones."""
+        with self.store.changed:
+            self._stopping = True
+            self.store._notify()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while True:
+            with self.store.changed:
+                job = None
+                while not self._stopping:
+                    job = self.store.claim(self._busy)
+                    if job:
+                        break
+                    self.store.changed.wait()
+                if job is None:
+                    return
+                self._busy.add(job["workspace"])
+            try:
+                self._run(job)
+            finally:
+                with self.store.changed:
+                    self._busy.discard(job["workspace"])
+                    self.store._notify()
+
+    def _run(self, job: dict):
+        print(f"--- 📥 JOB {job['id']}: {job['request'][:60]} ---")
+        workspace, mind = workspace_dirs(job["workspace"])
+
+        def stream_graph() -> dict:
+            final = {}
+            for event in self.graph.stream(self.initial_state(job["request"])):
+                for node_name, update in event.items():
+                    self.store.add_event(job["id"], node_name, update or {})
+                    final.update(update or {})
+            return final
+
+        try:
+            with use_workspace(workspace, mind), use_priority(INTERACTIVE):
+                if not mind.exists():
+                    reset_project_memory()
+                final, cache = cached_run(job["request"], stream_graph, bypass=job["no_cache"])
+            if cache == "hit":
+                # Nothing streamed: replay the cached final state as one event
+                self.store.add_event(job["id"], "cache", final)
+            self.store.finish(job["id"], "done", result=final, cache=cache)
+            print(f"   > ✅ Job {job['id']} done ({cache})")
+        except Exception as e:
+            self.store.finish(job["id"], "error", error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+            print(f"   > 💥 Job {job['id']} failed: {e}")
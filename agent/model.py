@@ -1,20 +1,129 @@
+import copy
+import importlib
+import json
 import os
+from functools import lru_cache
+from pathlib import Path
 from dotenv import load_dotenv
-from langchain_anthropic import ChatAnthropic
+from agent.scheduler import ScheduledModel, get_scheduler
 
 # 1. Load environment variables
 load_dotenv()
 
-# 2. Verify API Key
-if not os.getenv("ANTHROPIC_API_KEY"):
-    raise ValueError("ANTHROPIC_API_KEY not found in .env file.")
+# 2. Per-node model settings
+# Every node starts from "default", then applies its own entry under "nodes", then the
+# tier it runs at ("default" normally, "strong" once the Coder escalates).
+# Override any part with a JSON file: AGENT_MODEL_CONFIG=path/to/models.json
+DEFAULT_MODEL_CONFIG = {
+    "default": {
+        "provider": "anthropic",
+        "model": "claude-3-haiku-20240307",  # <--- The model we proved works
+        "temperature": 0,
+        "max_tokens": 4096
+    },
+    "nodes": {
+        "bouncer": {"max_tokens": 200},     # {"decision": ..., "reason": ...}
+        "optimizer": {"max_tokens": 16},    # "architect" | "dev_loop"
+        "architect": {"max_tokens": 4096},
+        "coder": {"max_tokens": 4096},
+        "debugger": {"max_tokens": 1024},
+        "finalizer": {"max_tokens": 4096}   # full memory.json; raised further as memory grows (finalizer.py)
+    },
+    "tiers": {
+        "default": {},
+        "strong": {"model": "claude-3-5-sonnet-20240620"}
+    },
+    # Retry the Coder on the stronger tier after this many failed Debugger rounds
+    "escalation": {
+        "enabled": True,
+        "nodes": ["coder"],
+        "after_failed_rounds": 1,
+        "tier": "strong"
+    }
+}
 
-def get_model():
+def _merge(base: dict, override: dict) -> dict:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+@lru_cache(maxsize=None)
+def _load_model_config(path: str | None) -> dict:
+    if not path:
+        return DEFAULT_MODEL_CONFIG
+    return _merge(DEFAULT_MODEL_CONFIG, json.loads(Path(path).read_text(encoding="utf-8")))
+
+def load_model_config() -> dict:
+    """The active model config (defaults merged with AGENT_MODEL_CONFIG, if set)."""
+    return _load_model_config(os.getenv("AGENT_MODEL_CONFIG"))
+
+def resolve_model_settings(node: str | None = None, tier: str = "default") -> dict:
+    """Settings for one call: default <- node entry <- tier."""
+    model_config = load_model_config()
+    settings = dict(model_config["default"])
+    if node:
+        settings.update(model_config["nodes"].get(node, {}))
+    settings.update(model_config["tiers"].get(tier, {}))
+    return settings
+
+def pick_tier(node: str, state: dict) -> str:
+    """Escalation policy: stronger tier once the dev loop has failed enough (or stalled)."""
+    policy = load_model_config()["escalation"]
+    if not policy.get("enabled") or node not in policy.get("nodes", []):
+        return "default"
+
+    failed_rounds = sum(
+        1 for entry in state.get("debug_history", [])
+        if entry.get("role") == "debugger" and entry.get("status") != "approved"
+    )
+    if state.get("escalate") or failed_rounds >= policy.get("after_failed_rounds", 1):
+        return policy.get("tier", "strong")
+    return "default"
+
+# 3. Providers
+
+def _anthropic(settings: dict):
+    from langchain_anthropic import ChatAnthropic
+
+    if not os.getenv("ANTHROPIC_API_KEY"):
+        raise ValueError("ANTHROPIC_API_KEY not found in .env file.")
+    extra = {"base_url": settings["base_url"]} if settings.get("base_url") else {}
+    return ChatAnthropic(
+        model=settings["model"],
+        temperature=settings["temperature"],
+        max_tokens=settings["max_tokens"],
+        max_retries=0,  # Retries are handled (with backoff) by agent.scheduler
+        **extra
+    )
+
+def _fake(settings: dict):
+    """Local stub: replies with the configured "responses", no network needed."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    return FakeListChatModel(responses=settings.get("responses") or ["<APPROVED />"])
+
+PROVIDERS = {
+    "anthropic": _anthropic,
+    "fake": _fake
+}
+
+def get_model(node: str | None = None, tier: str = "default", **overrides):
     """
-    Returns the configured Anthropic LLM.
+    Returns the configured LLM for `node` at `tier`, behind the shared call scheduler.
+    `provider` may also be "package.module:factory" for custom/stub models.
     """
-    return ChatAnthropic(
-        model="claude-3-haiku-20240307",  # <--- The model we proved works
-        temperature=0, 
-        max_tokens=4096
-    )
\ No newline at end of file
+    settings = {**resolve_model_settings(node, tier), **overrides}
+    provider = settings.get("provider", "anthropic")
+
+    if provider in PROVIDERS:
+        model = PROVIDERS[provider](settings)
+    elif ":" in provider:
+        module_name, factory = provider.split(":", 1)
+        model = getattr(importlib.import_module(module_name), factory)(settings)
+    else:
+        raise ValueError(f"Unknown model provider: {provider}")
+    return ScheduledModel(model, get_scheduler(), settings.get("max_tokens", 4096))
@@ -1,15 +1,21 @@
 from .bouncer import validate_scope
 from .prompt_optimizer import optimize_prompt_node
 from .architect import generate_spec
-from .coder import coder_node        # Make sure file is named coder.py
+from .coder import coder_node, coder_step_node  # Make sure file is named coder.py
 from .debugger import debugger_node  # Make sure file is named debugger.py
 from .finalizer import finalizer_node
+from .speculative import make_speculative_triage
+from .fanout import dispatch_ready_steps, join_steps_node
 
 __all__ = [
     "validate_scope",
     "optimize_prompt_node",
     "generate_spec",
     "coder_node",
+    "coder_step_node",
     "debugger_node",
     "finalizer_node",
+    "make_speculative_triage",
+    "dispatch_ready_steps",
+    "join_steps_node",
 ]
\ No newline at end of file
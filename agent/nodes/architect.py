@@ -1,7 +1,58 @@
+import json
+import re
 from langchain_core.messages import SystemMessage, HumanMessage
 from agent.states import AgentState
 from agent.model import get_model
-from agent.tools import list_files, reset_project_memory
+from agent import config
+from agent.tools import workspace_outline, reset_project_memory
+
+def _as_list(value) -> list:
+    if not isinstance(value, list):
+        raise ValueError(f"expected a list, got {value!r}")
+    return value
+
+def _step_id(value) -> int:
+    """Step ids must be integers (or integer strings); int("step-1") raises ValueError too."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"bad step id: {value!r}")
+    return int(value)
+
+def _file_path(value) -> str:
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"bad file path: {value!r}")
+    return value
+
+def parse_plan(content: str) -> tuple[str, list[dict]]:
+    """Splits the Architect's output into the Markdown plan and its structured steps."""
+    match = re.search(r"<plan_steps>(.*?)</plan_steps>", content, re.DOTALL)
+    if not match:
+        return content, []
+
+    plan = (content[:match.start()] + content[match.end():]).strip()
+    try:
+        raw_steps = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        print("   > ⚠️ Could not parse <plan_steps>, falling back to a single Coder")
+        return plan, []
+    if not isinstance(raw_steps, list):
+        return plan, []
+
+    steps = []
+    try:
+        for position, raw in enumerate(raw_steps, start=1):
+            if not isinstance(raw, dict) or not raw.get("task"):
+                continue
+            steps.append({
+                "id": _step_id(raw.get("id", position)),
+                "task": str(raw["task"]),
+                "files": [_file_path(f) for f in _as_list(raw.get("files", []))],
+                "depends_on": [_step_id(d) for d in _as_list(raw.get("depends_on", []))]
+            })
+    except ValueError as e:
+        # Model output is untrusted: one malformed step means the structure can't be relied on
+        print(f"   > ⚠️ Invalid <plan_steps> ({e}), falling back to a single Coder")
+        return plan, []
+    return plan, steps
 
 def generate_spec(state: AgentState):
     print("--- 🏗️ ARCHITECT: Generating Technical Spec ---")
@@ -30,22 +81,22 @@ What would you like to build next?
 """
         return {
             "plan": plan,
+            "plan_steps": [],
             "dev_iterations": 0,
             "dev_loop_complete": True  # Skip dev loop entirely for resets
         }
     
     # NORMAL CASE: Generate actual technical spec
-    # 1. Gather Context
-    current_files = list_files()
-    files_str = "\n".join(current_files) if current_files else "(No files yet)"
+    # 1. Gather Context (file list + outline of existing Python APIs)
+    files_str = workspace_outline(config.CODE_OUTLINE_TOKENS)
     
     # 2. Prepare the Brain
-    llm = get_model()
+    llm = get_model("architect")
     
     system_prompt = f"""You are a Software Architect.
     Your goal is to design a robust, step-by-step implementation plan for the user's request.
     
-    CURRENT FILE STRUCTURE:
+    CURRENT FILE STRUCTURE (with module outlines):
     {files_str}
     
     INSTRUCTIONS:
@@ -54,13 +105,22 @@ What would you like to build next?
     3. Specify exactly which files need to be created or modified.
     4. Consider dependencies (e.g., "Install package X before importing it").
     
+    5. Every step owns the files it creates or modifies (tests included). Two steps must never own the same file.
+    
     OUTPUT FORMAT:
-    Return a clear Markdown-formatted plan.
+    Return a clear Markdown-formatted plan, followed by the same steps as JSON inside <plan_steps> tags.
+    "depends_on" lists the ids of steps that must be finished first.
     Example:
     ## Plan
-    1. Create `src/utils.py` with helper functions.
+    1. Create `src/utils.py` with helper functions (tested in `tests/test_utils.py`).
     2. Modify `main.py` to import utils.
-    3. Install `pandas`.
+    
+    <plan_steps>
+    [
+      {{"id": 1, "task": "Create src/utils.py with helper functions and tests/test_utils.py", "files": ["src/utils.py", "tests/test_utils.py"], "depends_on": []}},
+      {{"id": 2, "task": "Modify main.py to import utils", "files": ["main.py"], "depends_on": [1]}}
+    ]
+    </plan_steps>
     """
     
     # 3. Call the Model
@@ -72,8 +132,12 @@ What would you like to build next?
     ])
     
     # 4. Save to State
+    plan, plan_steps = parse_plan(response.content)
+    print(f"   > Plan has {len(plan_steps)} structured step(s)")
     return {
-        "plan": response.content,
+        "plan": plan,
+        "plan_steps": plan_steps,
+        "completed_steps": [],
         "dev_iterations": 0,
         "dev_loop_complete": False
     }
\ No newline at end of file
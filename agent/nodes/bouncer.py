@@ -3,19 +3,23 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from agent.states import AgentState
 from agent.model import get_model
 
+# Project Management Commands bypass the LLM check and go straight through
+MANAGEMENT_KEYWORDS = [
+    "reset", "clear", "delete", "wipe", "clean", 
+    "new project", "start over", "start fresh", "clear workspace"
+]
+
+def is_management_command(request: str) -> bool:
+    """True for reset/clear style requests that the Architect handles directly."""
+    request_lower = request.lower()
+    return any(keyword in request_lower for keyword in MANAGEMENT_KEYWORDS)
+
 def validate_scope(state: AgentState):
     print("--- 🛡️ BOUNCER: Security & Scope Check ---")
     request = state.get("request", "")
     
     # SPECIAL CASE: Project Management Commands
-    # These should bypass the LLM check and go straight through
-    management_keywords = [
-        "reset", "clear", "delete", "wipe", "clean", 
-        "new project", "start over", "start fresh", "clear workspace"
-    ]
-    
-    request_lower = request.lower()
-    if any(keyword in request_lower for keyword in management_keywords):
+    if is_management_command(request):
         print("   > ✅ Project management command detected - allowing through")
         return {
             "in_scope": True, 
@@ -39,7 +43,7 @@ def validate_scope(state: AgentState):
     
     user_prompt = f"""USER REQUEST: "{request}" """
     
-    llm = get_model()
+    llm = get_model("bouncer")
     
     try:
         response = llm.invoke([
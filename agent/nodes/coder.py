@@ -1,25 +1,29 @@
 import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from pathlib import Path
 from langchain_core.messages import SystemMessage, HumanMessage
+from agent import config
 from agent.states import AgentState
-from agent.model import get_model
-from agent.tools import list_files, write_file
+from agent.model import get_model, pick_tier
+from agent.tools import (
+    list_files, write_file, workspace_outline, run_command, find_test_files, exit_code_of,
+    get_workspace_root, use_workspace
+)
 
-def coder_node(state: AgentState):
-    print("--- 🧑‍💻 CODER: Writing Code ---")
-    
-    # 1. Gather Context
-    current_files = list_files()
-    files_str = "\n".join(current_files) if current_files else "(No files yet)"
-    
-    # 2. Determine Mode: "New Feature" vs "Bug Fix"
+def _build_messages(state: AgentState, files_str: str) -> list:
+    """System + user prompt for one Coder attempt."""
+    # Determine Mode: "New Feature" vs "Bug Fix"
     feedback = state.get("debug_feedback", None)
-    
+
     if feedback:
         print(f"   > Mode: FIXING (Feedback: {feedback[:50]}...)")
         instruction = f"""
-        CRITICAL: The previous code had issues. 
+        CRITICAL: The previous code had issues.
         DEBUGGER FEEDBACK: {feedback}
-        
+
         Fix the code based on this feedback.
         """
     else:
@@ -29,64 +33,224 @@ def coder_node(state: AgentState):
         {state.get('plan')}
         """
 
-    # 3. Call the Model
-    llm = get_model()
-    
     # --- SPLIT PROMPT TO FIX 400 ERROR ---
     # Part A: Identity & Format (System)
-    system_message = """You are the Coder. 
+    system_message = """You are the Coder.
     Your job is to write code AND write tests to prove it works.
-    
+
     IMPORTANT:
     1. Always write the main logic (e.g. calculator.py).
     2. Always write a test script (e.g. test_calculator.py) using 'unittest' or basic assertions.
     3. The Debugger will run this test script to verify your work.
-    
+
     OUTPUT FORMAT:
     <write_file path="filename.py">
     ... code here ...
     </write_file>
     """
-    
+
     # Part B: Context & Task (User)
     user_message = f"""
-    CURRENT FILES:
+    CURRENT FILES (with module outlines):
     {files_str}
-    
+
     INSTRUCTIONS:
     {instruction}
     """
-    
-    # Invoke with BOTH messages
-    response = llm.invoke([
+
+    return [
         SystemMessage(content=system_message),
         HumanMessage(content=user_message)
-    ])
-    content = response.content
-    
-    # 4. Execute Writes
+    ]
+
+def _parse_writes(content: str) -> list[tuple[str, str]]:
+    """Extracts (path, code) pairs from the model's <write_file> tags."""
     matches = re.findall(r'<write_file path=["\'](.*?)["\']>\s*\n?(.*?)\n?\s*</write_file>', content, re.DOTALL)
-    
+    return [(path, code.strip()) for path, code in matches]
+
+def _apply_writes(writes: list[tuple[str, str]], verbose: bool = True) -> list[str]:
+    """Writes files into the current workspace and returns the touched paths."""
     touched_files = []
-    if matches:
-        for path, code in matches:
-            clean_code = code.strip()
-            write_file(path, clean_code)
-            touched_files.append(path)
+    for path, code in writes:
+        write_file(path, code)
+        touched_files.append(path)
+        if verbose:
             print(f"   > Wrote {path}")
+    return touched_files
+
+# --- PARALLEL CANDIDATES ---
+
+def _try_candidate(index: int, messages: list, base: Path, tier: str) -> dict:
+    """Generates one candidate and runs the tests against it in a scratch copy of the workspace."""
+    llm = get_model("coder", tier, temperature=config.CANDIDATE_TEMPERATURE)
+    writes = _parse_writes(llm.invoke(messages).content)
+    result = {"index": index, "writes": writes, "passed": False, "failures": None}
+    if not writes:
+        return result
+
+    scratch = Path(tempfile.mkdtemp(prefix=f"candidate{index}_"))
+    try:
+        if base.exists():
+            shutil.copytree(base, scratch, dirs_exist_ok=True)
+        with use_workspace(scratch):
+            _apply_writes(writes, verbose=False)
+            test_files = find_test_files(list_files())
+            exit_codes = [exit_code_of(run_command(f"python {tf}")) for tf in test_files]
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    result["failures"] = sum(1 for code in exit_codes if code != 0)
+    # No tests means the Debugger would reject it anyway
+    result["passed"] = bool(exit_codes) and result["failures"] == 0
+    return result
+
+def _rank(candidate: dict) -> tuple:
+    """Lower is better: passing first, then fewest failing tests, then most files written."""
+    failures = candidate["failures"] if candidate["failures"] is not None else float("inf")
+    return (not candidate["passed"], failures, -len(candidate["writes"]), candidate["index"])
+
+def _generate_candidates(messages: list, count: int, tier: str) -> dict:
+    """Runs `count` candidates concurrently and returns the one to promote."""
+    print(f"   > Generating {count} candidates in parallel ({config.CANDIDATE_SELECTION} passing wins)")
+    base = get_workspace_root()
+    pool = ThreadPoolExecutor(max_workers=count)
+    futures = [
+        pool.submit(copy_context().run, _try_candidate, i, messages, base, tier)
+        for i in range(count)
+    ]
+
+    finished = []
+    try:
+        for future in as_completed(futures):
+            try:
+                candidate = future.result()
+            except Exception as e:
+                print(f"   > ⚠️ Candidate failed: {e}")
+                continue
+            finished.append(candidate)
+            status = "passed" if candidate["passed"] else f"failing tests: {candidate['failures']}"
+            print(f"   > Candidate {candidate['index']}: {len(candidate['writes'])} file(s), {status}")
+            if candidate["passed"] and config.CANDIDATE_SELECTION == "first":
+                break
+    finally:
+        # Stragglers finish in the background and clean up their own scratch dirs
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if not finished:
+        return {"index": None, "writes": [], "passed": False, "failures": None, "evaluated": 0}
+    best = min(finished, key=_rank)
+    return {**best, "evaluated": len(finished)}
+
+def coder_node(state: AgentState):
+    print("--- 🧑‍💻 CODER: Writing Code ---")
+
+    # 1. Gather Context (file list + outline of existing Python APIs)
+    files_str = workspace_outline(config.CODE_OUTLINE_TOKENS)
+
+    # 2. Build the prompt (mode depends on Debugger feedback)
+    messages = _build_messages(state, files_str)
+
+    # 3. Call the Model (once, or N candidates at once)
+    # Stronger model only once a Debugger round has failed (see agent/model.py)
+    tier = pick_tier("coder", state)
+    if tier != "default":
+        print(f"   > ⬆️ Escalating to the '{tier}' model tier")
+    history_entry = {"role": "coder", "tier": tier}
+    if config.CODER_CANDIDATES > 1:
+        winner = _generate_candidates(messages, config.CODER_CANDIDATES, tier)
+        writes = winner["writes"]
+        history_entry.update({
+            "candidates": config.CODER_CANDIDATES,
+            "candidates_evaluated": winner["evaluated"],
+            "candidate_index": winner["index"],
+            "candidate_passed": winner["passed"]
+        })
+        if winner["index"] is not None:
+            print(f"   > Promoting candidate {winner['index']}")
     else:
+        llm = get_model("coder", tier)
+        response = llm.invoke(messages)
+        writes = _parse_writes(response.content)
+
+    # 4. Execute Writes
+    touched_files = _apply_writes(writes)
+    if not writes:
         print("   > ⚠️ No file tags found in output.")
-    
+
     # ⚠️ MEDIUM FIX: Validation
     if not touched_files:
         print("   > ⚠️ WARNING: Coder produced no files. Debugger will likely reject this iteration.")
 
-    # 5. Pass baton to Debugger
+    # 5. Pass baton to Debugger (a round of candidates counts as one iteration)
+    history_entry.update({
+        "touched": touched_files,
+        "files_written": len(touched_files)  # ← Track count for debugging
+    })
     return {
         "dev_iterations": state.get("dev_iterations", 0) + 1,
-        "debug_history": state.get("debug_history", []) + [{
-            "role": "coder", 
+        "debug_history": state.get("debug_history", []) + [history_entry]
+    }
+
+# --- PLAN FAN-OUT ---
+
+def coder_step_node(payload: dict):
+    """
+    Implements ONE structured plan step. Runs concurrently with the other ready steps,
+    so it only writes the files its step owns and reports back through `step_results`.
+    """
+    step = payload["step"]
+    print(f"--- 🧑‍💻 CODER (step {step['id']}): {step['task'][:60]} ---")
+
+    owned = step.get("files", [])
+    owned_str = "\n".join(owned) if owned else "(not specified)"
+    files_str = workspace_outline(config.CODE_OUTLINE_TOKENS)
+
+    system_message = """You are the Coder, one of several working on the same plan in parallel.
+    Your job is to implement ONLY your assigned step, with tests where the step owns a test file.
+
+    IMPORTANT:
+    1. Only write the files listed under YOUR FILES. Other coders own the rest.
+    2. You may import from files owned by earlier steps; assume they follow the plan.
+
+    OUTPUT FORMAT:
+    <write_file path="filename.py">
+    ... code here ...
+    </write_file>
+    """
+
+    user_message = f"""
+    FULL PLAN (for context):
+    {payload.get('plan')}
+
+    YOUR STEP ({step['id']}):
+    {step['task']}
+
+    YOUR FILES:
+    {owned_str}
+
+    CURRENT FILES (with module outlines):
+    {files_str}
+    """
+
+    llm = get_model("coder")
+    response = llm.invoke([
+        SystemMessage(content=system_message),
+        HumanMessage(content=user_message)
+    ])
+
+    writes = _parse_writes(response.content)
+    skipped = []
+    if owned:
+        skipped = [path for path, _ in writes if path not in owned]
+        writes = [(path, code) for path, code in writes if path in owned]
+        for path in skipped:
+            print(f"   > ⚠️ Step {step['id']} tried to write {path} (not owned), skipped")
+
+    touched_files = _apply_writes(writes)
+    return {
+        "step_results": [{
+            "step": step["id"],
             "touched": touched_files,
-            "files_written": len(touched_files)  # ← Track count for debugging
+            "skipped": skipped
         }]
-    }
\ No newline at end of file
+    }
@@ -1,25 +1,81 @@
 import ast
 from langchain_core.messages import SystemMessage, HumanMessage
+from agent import config
+from agent.convergence import assess_progress, failure_score, fingerprint
 from agent.states import AgentState
+from agent.static_check import static_check
 from agent.model import get_model
-from agent.tools import list_files, read_file, run_command
+from agent.tools import list_files, read_file, read_preview, run_command_detailed, find_test_files
+
+def _reject(state: AgentState, status: str, feedback: str, evidence: str, runs: list[dict] | None = None):
+    """
+    Sends the code back to the Coder, unless the loop has stopped making progress.
+    `evidence` is the raw failure output used to fingerprint this round.
+    """
+    history = state.get("debug_history", [])
+    coder_entries = [e for e in history if e.get("role") == "coder"]
+    touched = coder_entries[-1].get("touched", []) if coder_entries else []
+
+    entry = {
+        "role": "debugger",
+        "status": status,
+        "fingerprint": fingerprint(evidence, touched),
+        "score": failure_score(evidence)
+    }
+    if runs is not None:
+        entry["runs"] = runs
+    history = history + [entry]
+    budget = state.get("iteration_budget") or config.MAX_ITERATIONS
+    progress = assess_progress(history)
+    entry["progress"] = progress
+    already_escalated = any(e.get("escalated") for e in history[:-1] if e.get("role") == "debugger")
+
+    if progress in ("stalled", "oscillating"):
+        if already_escalated:
+            # Escalation didn't help either: stop instead of burning more iterations
+            print(f"   > ⛔ No progress ({progress}) after escalation. Stopping dev loop.")
+            entry["status"] = "no_progress"
+            entry["message"] = f"Stopped early: {progress} on the same failure. Manual review needed."
+            return {
+                "dev_loop_complete": True,
+                "debug_feedback": None,
+                "escalate": False,
+                "debug_history": history
+            }
+        print(f"   > 🔁 No progress ({progress}). Escalating.")
+        entry["escalated"] = True
+        feedback = (
+            "NO PROGRESS: the last attempts kept hitting the same failure. "
+            "Do not repeat the previous fix; take a different approach.\n\n" + feedback
+        )
+    elif progress == "improving" and state.get("dev_iterations", 0) >= budget - 1 and budget < config.MAX_ITERATIONS_CAP:
+        budget += 1
+        print(f"   > 📉 Failures decreasing. Extending budget to {budget} iterations.")
+
+    return {
+        "dev_loop_complete": False,
+        "debug_feedback": feedback,
+        "escalate": bool(entry.get("escalated")),
+        "iteration_budget": budget,
+        "debug_history": history
+    }
 
 def debugger_node(state: AgentState):
     print("--- 🕵️ DEBUGGER: Testing Code ---")
     
-    # ⚠️ CRITICAL FIX: Prevent infinite loops
-    MAX_ITERATIONS = 5
+    # ⚠️ CRITICAL FIX: Prevent infinite loops (budget adapts, see _reject)
+    max_iterations = state.get("iteration_budget") or config.MAX_ITERATIONS
     current_iteration = state.get("dev_iterations", 0)
     
-    if current_iteration >= MAX_ITERATIONS:
-        print(f"   > ⛔ Max iterations ({MAX_ITERATIONS}) reached. Stopping dev loop.")
+    if current_iteration >= max_iterations:
+        print(f"   > ⛔ Max iterations ({max_iterations}) reached. Stopping dev loop.")
         return {
             "dev_loop_complete": True,
             "debug_feedback": None,
             "debug_history": state.get("debug_history", []) + [{
                 "role": "debugger", 
                 "status": "max_iterations_reached",
-                "message": f"Stopped after {MAX_ITERATIONS} attempts. Manual review needed."
+                "message": f"Stopped after {max_iterations} attempts. Manual review needed."
             }]
         }
     
@@ -27,10 +83,12 @@ def debugger_node(state: AgentState):
     
     # 1. PRE-CHECK: Syntax (Fast Fail)
     syntax_errors = []
+    sources = {}
     for file in current_files:
         if file.endswith(".py"):
             try:
                 content = read_file(file)
+                sources[file] = content
                 ast.parse(content)
             except SyntaxError as e:
                 syntax_errors.append(f"{file}: {str(e)}")
@@ -38,42 +96,56 @@ def debugger_node(state: AgentState):
     if syntax_errors:
         error_msg = "Syntax Errors Found (Auto-Reject):\n" + "\n".join(syntax_errors)
         print(f"   > ❌ {error_msg}")
-        return {
-            "dev_loop_complete": False,
-            "debug_feedback": error_msg,
-            "debug_history": state.get("debug_history", []) + [{"role": "debugger", "status": "syntax_error"}]
-        }
+        return _reject(state, "syntax_error", error_msg, error_msg)
+
+    # 1b. PRE-CHECK: Undefined names / broken imports (Fast Fail, see agent/static_check.py)
+    # Only the files the Coder just wrote are checked, against the whole workspace
+    if config.STATIC_CHECK:
+        coder_entries = [e for e in state.get("debug_history", []) if e.get("role") == "coder"]
+        touched = [f for f in (coder_entries[-1].get("touched", []) if coder_entries else []) if f in sources]
+        findings = static_check(sources, touched or None)
+        if findings:
+            error_msg = "Static Check Failed (Auto-Reject):\n" + "\n".join(findings)
+            print(f"   > ❌ {error_msg}")
+            return _reject(state, "static_error", error_msg, error_msg)
 
     # 2. RUN TESTS (The Simulation)
-    test_files = [f for f in current_files if "test" in f.lower() or "t_" in f.lower()]
+    test_files = find_test_files(current_files)
     execution_logs = ""
+    test_runs = []  # Per-run sandbox resource usage, kept in debug_history
     
     if test_files:
         print(f"   > Found tests: {test_files}")
         for tf in test_files:
             print(f"   > Running {tf}...")
-            # Run the test file using the tool
-            result = run_command(f"python {tf}")
-            execution_logs += f"\n--- EXECUTION OF {tf} ---\n{result}\n"
+            # Run the test file using the tool (sandboxed, see agent/tools.py)
+            output, result = run_command_detailed(f"python {tf}")
+            execution_logs += f"\n--- EXECUTION OF {tf} ---\n{output}\n"
+            if result:
+                test_runs.append({
+                    "file": tf,
+                    "exit_code": result["exit_code"],
+                    "elapsed": result["elapsed"],
+                    "cpu_seconds": result["cpu_seconds"],
+                    "max_rss_kb": result["max_rss_kb"],
+                    "limits_hit": result["limits_hit"]
+                })
+                if result["limits_hit"]:
+                    print(f"   > ⚠️ {tf} hit sandbox limits: {', '.join(result['limits_hit'])}")
     else:
         # ⚠️ CRITICAL FIX: NO TESTS = AUTO-REJECT
         error_msg = "No test files found. Code must include tests to verify functionality."
         print(f"   > ❌ {error_msg}")
-        return {
-            "dev_loop_complete": False,
-            "debug_feedback": error_msg,
-            "debug_history": state.get("debug_history", []) + [{
-                "role": "debugger", 
-                "status": "no_tests_found"
-            }]
-        }
+        return _reject(state, "no_tests_found", error_msg, error_msg)
 
     # 3. ANALYZE RESULTS (LLM)
-    llm = get_model()
+    llm = get_model("debugger")
     
+    # Sources already read above; anything else (logs, data, binaries) only as a bounded preview
     code_dump = ""
     for file in current_files:
-        code_dump += f"\n--- {file} ---\n{read_file(file)}\n"
+        content = sources[file] if file in sources else read_preview(file)
+        code_dump += f"\n--- {file} ---\n{content}\n"
         
     # --- SPLIT PROMPT TO FIX 400 ERROR ---
     system_message = """You are the QA Debugger.
@@ -106,12 +178,10 @@ def debugger_node(state: AgentState):
         return {
             "dev_loop_complete": True, 
             "debug_feedback": None,
-            "debug_history": state.get("debug_history", []) + [{"role": "debugger", "status": "approved"}]
+            "escalate": False,
+            "debug_history": state.get("debug_history", []) + [{"role": "debugger", "status": "approved", "runs": test_runs}]
         }
     else:
         print("   > ⚠️ Test Failed or Issues Found")
-        return {
-            "dev_loop_complete": False, 
-            "debug_feedback": content,
-            "debug_history": state.get("debug_history", []) + [{"role": "debugger", "status": "rejected"}]
-        }
\ No newline at end of file
+        # Fingerprint the real test output, not the LLM's (ever-changing) wording
+        return _reject(state, "rejected", content, execution_logs, test_runs)
\ No newline at end of file
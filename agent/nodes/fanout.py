@@ -0,0 +1,63 @@
+from langgraph.types import Send
+from agent.states import AgentState
+
+def ready_steps(state: AgentState) -> list[dict]:
+    """
+    Plan steps that can run now: not done yet, dependencies done, and no file
+    owned by another step in the same wave.
+    """
+    steps = state.get("plan_steps") or []
+    done = set(state.get("completed_steps") or [])
+    known = {step["id"] for step in steps}
+    remaining = [step for step in steps if step["id"] not in done]
+
+    ready = [
+        step for step in remaining
+        if all(dep in done or dep not in known for dep in step.get("depends_on", []))
+    ]
+    if remaining and not ready:
+        # Dependency cycle in the plan: run what is left rather than stalling
+        print("   > ⚠️ Plan has a dependency cycle, dispatching remaining steps")
+        ready = remaining
+
+    wave, claimed = [], set()
+    for step in sorted(ready, key=lambda s: s["id"]):
+        files = set(step.get("files", []))
+        if files & claimed:
+            continue  # Picked up in a later wave
+        claimed |= files
+        wave.append(step)
+    return wave
+
+def dispatch_ready_steps(state: AgentState) -> list[Send]:
+    """One Send per ready step, mapped onto the step coder."""
+    payload = {
+        "request": state.get("request"),
+        "plan": state.get("plan")
+    }
+    return [Send("step_coder", {**payload, "step": step}) for step in ready_steps(state)]
+
+def join_steps_node(state: AgentState):
+    """Collects the parallel step coders' results once the wave has finished."""
+    steps = state.get("plan_steps") or []
+    results = state.get("step_results") or []
+    done = set(state.get("completed_steps") or []) | {r["step"] for r in results}
+    remaining = [step["id"] for step in steps if step["id"] not in done]
+
+    print(f"--- 🔗 JOIN: {len(done)}/{len(steps)} plan steps done ---")
+    update = {"completed_steps": sorted(done)}
+    if remaining:
+        return update
+
+    # Whole plan written: hand over to the Debugger as one Coder iteration
+    touched_files = [path for r in results for path in r["touched"]]
+    update.update({
+        "dev_iterations": state.get("dev_iterations", 0) + 1,
+        "debug_history": state.get("debug_history", []) + [{
+            "role": "coder",
+            "touched": touched_files,
+            "files_written": len(touched_files),
+            "parallel_steps": len(steps)
+        }]
+    })
+    return update
@@ -2,7 +2,7 @@ import json
 import datetime
 from langchain_core.messages import SystemMessage, HumanMessage
 from agent.states import AgentState
-from agent.model import get_model
+from agent.model import get_model, resolve_model_settings
 from agent.tools import load_mind_files, update_memory, list_files
 
 def finalizer_node(state: AgentState):
@@ -21,13 +21,16 @@ def finalizer_node(state: AgentState):
     )
 
     # 2. The Memory Update Prompt
-    llm = get_model()
+    # The reply is the whole memory.json, so the cap grows with it (~3 chars per token, plus room for additions)
+    old_memory_json = json.dumps(current_memory, indent=2)
+    max_tokens = max(resolve_model_settings("finalizer")["max_tokens"], len(old_memory_json) // 3 + 1024)
+    llm = get_model("finalizer", max_tokens=max_tokens)
     
     system_prompt = f"""You are the Project Historian.
     Your job is to update the project's 'memory.json' based on the work just completed.
     
     OLD MEMORY:
-    {json.dumps(current_memory, indent=2)}
+    {old_memory_json}
     
     WORK DONE:
     - User Request: "{state['request']}"
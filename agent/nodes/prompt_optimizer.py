@@ -1,8 +1,7 @@
-import json
 from langchain_core.messages import SystemMessage, HumanMessage
 from agent.states import AgentState
 from agent.model import get_model
-from agent.tools import load_mind_files
+from agent.context import build_context
 
 def optimize_prompt_node(state: AgentState):
     """
@@ -12,20 +11,11 @@ def optimize_prompt_node(state: AgentState):
     """
     print("--- 🧠 OPTIMIZING PROMPT & LOADING CONTEXT ---")
     
-    # 1. Load the "Mind" (Manifest + Memory)
-    manifest, memory = load_mind_files()
-    
-    # Convert JSONs to string for the LLM to read
-    context_str = f"""
-    PROJECT MANIFEST (Rules & Stack):
-    {json.dumps(manifest, indent=2)}
-
-    PROJECT MEMORY (Current State):
-    {json.dumps(memory, indent=2)}
-    """
+    # 1. Load the "Mind" (Manifest + Memory), compact and trimmed to the token budget
+    context_str = build_context()
     
     # 2. Ask the LLM to route the request
-    llm = get_model()
+    llm = get_model("optimizer")
     
     system_prompt = """You are a Project Manager for a software project.
     Your job is to route the user's request based on the current project state.
@@ -56,7 +46,7 @@ def optimize_prompt_node(state: AgentState):
     # 3. Return updated state
     return {
         "branch_decision": decision,
-        "context": context_str, # Pass the full context forward
+        "context": context_str, # Pass the (budgeted) context forward
         # Initialize dev loop counters here so they are ready if needed
         "dev_iterations": 0,
         "dev_loop_complete": False
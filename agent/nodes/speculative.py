@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from agent.states import AgentState
+from .bouncer import validate_scope, is_management_command
+from .prompt_optimizer import optimize_prompt_node
+from .architect import generate_spec
+
+def make_speculative_triage(include_architect: bool = False):
+    """
+    Builds a node that runs the Bouncer and the Optimizer (and optionally the Architect)
+    at the same time. Speculative results are only committed if the Bouncer allows the request.
+    """
+    def speculative_triage(state: AgentState):
+        print("--- ⚡ TRIAGE: Speculative Bouncer + Optimizer ---")
+        request = state.get("request", "")
+
+        # Resets are destructive, so nothing may run ahead of the Bouncer for them
+        if is_management_command(request):
+            return validate_scope(state)
+
+        cancelled = threading.Event()
+
+        def downstream():
+            update = optimize_prompt_node(state)
+            if include_architect and update.get("branch_decision") == "architect" and not cancelled.is_set():
+                update = {**update, **generate_spec({**state, **update})}
+            return update
+
+        pool = ThreadPoolExecutor(max_workers=1)
+        # copy_context keeps the per-run workspace visible in the worker thread
+        future = pool.submit(copy_context().run, downstream)
+        try:
+            verdict = validate_scope(state)
+        except BaseException:
+            cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        if not verdict.get("in_scope"):
+            # Discard speculative work; a running model call just finishes in the background
+            cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            print("   > 🗑️ Speculative work discarded")
+            return verdict
+
+        speculative = future.result()
+        pool.shutdown()
+        print("   > ⚡ Speculative work committed")
+        return {**speculative, **verdict}
+
+    return speculative_triage
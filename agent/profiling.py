@@ -0,0 +1,297 @@
+"""
+Opt-in profiling of graph runs.
+
+Each node call runs under cProfile + tracemalloc. Per run this writes:
+  <dir>/<run_id>/<nn>_<node>.pstats   raw profile, open with `python -m pstats`
+  <dir>/<run_id>/profile.collapsed    collapsed stacks for flamegraph.pl / speedscope
+  <dir>/<run_id>/report.json          per-node wall time, time by category, peak memory
+
+Time is split into model client, waiting on the model scheduler (rate limits, concurrency,
+retry backoff), subprocess, file I/O and local Python. Memory figures
+are process-wide, so nodes that overlap other profiled nodes (batch workers, fan-out) get
+no peak and only approximate allocation sites (see "memory_note" in the report).
+cProfile only sees the thread that runs the node, so work a node hands to its own
+worker threads (speculative triage, coder candidates) shows up as time spent waiting.
+"""
+import cProfile
+import functools
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+CATEGORIES = ("model", "model_wait", "subprocess", "file_io", "local")
+
+_MODEL_MODULES = re.compile(r"[\\/](langchain\w*|anthropic|httpx|httpcore|h11|anyio|ssl|socket)([\\/]|\.py)")
+# Time spent in the call scheduler is queueing for rate limits / concurrency or retry backoff
+_SCHEDULER_FILES = re.compile(r"[\\/]agent[\\/]scheduler\.py$")
+_SUBPROCESS_FILES = re.compile(r"[\\/](subprocess|selectors|_sandbox_exec)\.py$")
+_FILE_IO_FILES = re.compile(
+    r"([\\/](pathlib|shutil|glob|fnmatch|genericpath|posixpath|ntpath|codecs)\.py|"
+    r"^<frozen (genericpath|posixpath|ntpath|codecs)>)$"
+)
+_FILE_IO_BUILTINS = re.compile(
+    r"(io\.open|posix\.(stat|lstat|scandir|listdir|mkdir|rmdir|unlink|rename|replace|open|fspath)|"
+    r"nt\.(stat|lstat|scandir|listdir|mkdir|rmdir|unlink)|"
+    r"of '_io\.|of 'posix\.ScandirIterator')"
+)
+_SUBPROCESS_BUILTINS = re.compile(r"posix\.(wait4|waitpid|fork_exec|read|killpg)|_posixsubprocess|_winapi")
+# Frames that don't say anything on their own: charge them to whoever called them
+_NEUTRAL_FILES = re.compile(r"[\\/](threading|contextlib|functools|queue|concurrent[\\/]futures[\\/]\w+)\.py$")
+
+def _own_category(func: tuple) -> str | None:
+    filename, _, name = func
+    if filename == "~":
+        if _FILE_IO_BUILTINS.search(name):
+            return "file_io"
+        if _SUBPROCESS_BUILTINS.search(name):
+            return "subprocess"
+        return None
+    if _MODEL_MODULES.search(filename):
+        return "model"
+    if _SCHEDULER_FILES.search(filename):
+        return "model_wait"
+    if _SUBPROCESS_FILES.search(filename) or (filename.endswith("tools.py") and name in (
+            "execute", "_wait_with_usage", "_drain", "_kill_process_group")):
+        return "subprocess"
+    if _FILE_IO_FILES.search(filename):
+        return "file_io"
+    if _NEUTRAL_FILES.search(filename):
+        return None
+    return "local"
+
+def categorize(stats: pstats.Stats) -> dict[str, float]:
+    """Self time per category. Builtins/plumbing inherit the category of their heaviest caller."""
+    raw = stats.stats
+    memo = {}
+
+    def category(func, seen=()):
+        if func in memo:
+            return memo[func]
+        own = _own_category(func)
+        if own is None:
+            callers = raw.get(func, (0, 0, 0, 0, {}))[4]
+            candidates = [c for c in callers if c not in seen]
+            own = "local"
+            if candidates:
+                heaviest = max(candidates, key=lambda c: callers[c][3])
+                own = category(heaviest, seen + (func,))
+        memo[func] = own
+        return own
+
+    totals = dict.fromkeys(CATEGORIES, 0.0)
+    for func, (_, _, tottime, _, _) in raw.items():
+        totals[category(func)] += tottime
+    return {k: round(v, 4) for k, v in totals.items()}
+
+def _frame_name(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({Path(filename).name}:{line})"
+
+def collapsed_stacks(stats: pstats.Stats, prefix: str, min_seconds: float = 1e-4, max_depth: int = 64) -> list[str]:
+    """
+    Approximate collapsed stacks ("a;b;c <microseconds>") from cProfile's caller graph.
+    A callee's time is split over its callers in proportion to the time each call edge took.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    lines = {}
+    roots = [func for func, entry in raw.items() if not entry[4]]
+
+    def walk(func, weight, stack):
+        _, _, tottime, cumtime, _ = raw[func]
+        frames = stack + [_frame_name(func)]
+        if cumtime > 0:
+            own = weight * tottime / cumtime
+            if own >= min_seconds:
+                key = ";".join([prefix] + frames)
+                lines[key] = lines.get(key, 0.0) + own
+        if len(frames) >= max_depth or cumtime <= 0:
+            return
+        for callee, edge_cumtime in callees.get(func, []):
+            child_weight = weight * edge_cumtime / cumtime
+            if child_weight >= min_seconds and _frame_name(callee) not in frames:
+                walk(callee, child_weight, frames)
+
+    for root in roots:
+        walk(root, raw[root][3], [])
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in lines.items() if seconds * 1e6 >= 1]
+
+class ProfileSession:
+    """Collects the node profiles of one graph run and writes its artifacts."""
+
+    def __init__(self, directory: Path, top_allocations: int = 10):
+        self.directory = Path(directory)
+        self.top_allocations = top_allocations
+        self.nodes = []
+        self.stacks = []
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def run_node(self, name: str, fn, *args, **kwargs):
+        profiler = cProfile.Profile()
+        token = _enter_node()
+        baseline_snapshot = tracemalloc.take_snapshot()
+        if not _overlapped(token):
+            tracemalloc.reset_peak()  # Process-wide: only safe while no other node is traced
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        try:
+            profiler.enable()
+            profiling = True
+        except ValueError:
+            profiling = False  # Another profiler is active on this interpreter
+
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - started
+            if profiling:
+                profiler.disable()
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            exclusive = not _exit_node(token)
+            allocations = snapshot.compare_to(baseline_snapshot, "lineno")
+            self._record(name, profiler if profiling else None, wall,
+                         peak - baseline if exclusive else None, allocations, exclusive)
+
+    def _record(self, name: str, profiler, wall: float, peak_bytes: int | None, allocations: list, exclusive: bool):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        entry = {
+            "seq": seq,
+            "node": name,
+            "wall_seconds": round(wall, 4),
+            "peak_memory_bytes": peak_bytes,
+            # Net growth while the node ran, by allocation site
+            "top_allocations": [
+                {"where": str(stat.traceback[0]), "bytes": stat.size_diff, "count": stat.count_diff}
+                for stat in allocations if stat.size_diff > 0
+            ][:self.top_allocations]
+        }
+        if not exclusive:
+            # tracemalloc can't tell threads apart: other nodes' allocations are mixed in
+            entry["memory_note"] = ("other profiled nodes ran concurrently: peak not measured, "
+                                    "top_allocations include their allocations")
+        stacks = []
+        if profiler is not None:
+            stats = pstats.Stats(profiler)
+            stats.dump_stats(self.directory / f"{seq:02d}_{name}.pstats")
+            entry["seconds_by_category"] = categorize(stats)
+            stacks = collapsed_stacks(stats, prefix=name)
+        else:
+            entry["skipped"] = "another profiler was already active"
+
+        with self._lock:
+            self.nodes.append(entry)
+            self.stacks.extend(stacks)
+
+    def write(self) -> Path:
+        """Writes report.json + profile.collapsed and returns the report path."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            nodes = sorted(self.nodes, key=lambda n: n["seq"])
+            stacks = list(self.stacks)
+
+        totals = dict.fromkeys(CATEGORIES, 0.0)
+        for node in nodes:
+            for category, seconds in node.get("seconds_by_category", {}).items():
+                totals[category] += seconds
+        report = {
+            "wall_seconds": round(sum(n["wall_seconds"] for n in nodes), 4),
+            "seconds_by_category": {k: round(v, 4) for k, v in totals.items()},
+            "peak_memory_bytes": max((n["peak_memory_bytes"] or 0 for n in nodes), default=0),
+            "nodes": nodes
+        }
+        (self.directory / "profile.collapsed").write_text("\n".join(stacks) + "\n", encoding="utf-8")
+        report_path = self.directory / "report.json"
+        report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return report_path
+
+_session: ContextVar[ProfileSession | None] = ContextVar("profile_session", default=None)
+
+# tracemalloc is process-wide and runs may overlap (batch workers, fan-out), so it stays
+# on while any profiled run is active
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            _tracing_owned = True
+        _tracing_users += 1
+
+def _release_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+# Nodes currently being profiled (across every run). A node that overlaps another one
+# at any point gets no peak figure: reset_peak()/peaks are process-wide.
+_active_nodes: dict[int, bool] = {}
+_next_token = 0
+
+def _enter_node() -> int:
+    global _next_token
+    with _tracing_lock:
+        _next_token += 1
+        token = _next_token
+        overlapped = bool(_active_nodes)
+        for other in _active_nodes:
+            _active_nodes[other] = True
+        _active_nodes[token] = overlapped
+        return token
+
+def _overlapped(token: int) -> bool:
+    with _tracing_lock:
+        return _active_nodes[token]
+
+def _exit_node(token: int) -> bool:
+    """Unregisters the node; True if it overlapped another profiled node."""
+    with _tracing_lock:
+        return _active_nodes.pop(token)
+
+@contextmanager
+def profile_run(directory):
+    """Profiles every (wrapped) node that runs in this context; writes artifacts on exit."""
+    session = ProfileSession(directory)
+    token = _session.set(session)
+    _acquire_tracing()
+    try:
+        yield session
+    finally:
+        _session.reset(token)
+        _release_tracing()
+        report = session.write()
+        print(f"   > 📊 Profile written to {report.parent}")
+
+def profiled(name: str, fn):
+    """Wraps a node so it is profiled whenever a profile_run() is active."""
+    @functools.wraps(fn)
+    def node(state):
+        session = _session.get()
+        if session is None:
+            return fn(state)
+        return session.run_node(name, fn, state)
+    return node
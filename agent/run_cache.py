@@ -0,0 +1,172 @@
+"""
+Run-level result cache.
+Key = normalized request + content hash of the workspace and the mind files. A hit
+replays the stored file changes (writes + deletions) and mind files, and returns the
+stored final state, so the graph does not run at all.
+"""
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from agent import config
+from agent.tools import get_mind_root, get_workspace_root
+
+CACHE_VERSION = 1
+MIND_FILES = ("manifest.json", "memory.json")
+# Final-state keys worth replaying (everything else is per-run plumbing)
+STATE_KEYS = ("in_scope", "rejection_reason", "branch_decision", "plan", "dev_iterations",
+              "dev_loop_complete", "debug_history", "final_summary", "memory_update")
+
+def normalize_request(request: str) -> str:
+    return re.sub(r"\s+", " ", request).strip()
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def snapshot() -> dict[str, str]:
+    """{relative path: sha256} for every file in the current workspace."""
+    root = get_workspace_root()
+    if not root.exists():
+        return {}
+    return {
+        p.relative_to(root).as_posix(): _file_hash(p)
+        for p in sorted(root.rglob("*")) if p.is_file()
+    }
+
+def run_key(request: str, files: dict[str, str] | None = None) -> str:
+    """Cache key for `request` against the current workspace + mind."""
+    files = snapshot() if files is None else files
+    digest = hashlib.sha256(f"v{CACHE_VERSION}\n{normalize_request(request)}\n".encode("utf-8"))
+    for rel, file_hash in sorted(files.items()):
+        digest.update(f"W {rel} {file_hash}\n".encode("utf-8"))
+    mind_root = get_mind_root()
+    for name in MIND_FILES:
+        path = mind_root / name
+        digest.update(f"M {name} {_file_hash(path) if path.exists() else '-'}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def _cache_path(key: str) -> Path:
+    return Path(config.RUN_CACHE_DIR) / f"{key}.json"
+
+def lookup(key: str) -> dict | None:
+    path = _cache_path(key)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError):
+        return None
+
+def cacheable(final: dict) -> bool:
+    """Only runs that finished cleanly: rejected by the Bouncer, or finalized with approved code / a reset."""
+    if not final.get("in_scope", False):
+        return bool(final.get("rejection_reason")) and not str(final["rejection_reason"]).startswith("System Error")
+    if not final.get("final_summary"):
+        return False
+    if not final.get("memory_update"):
+        return False  # Finalizer couldn't save memory; replaying would skip that too
+    debugger = [e for e in final.get("debug_history", []) if e.get("role") == "debugger"]
+    return not debugger or debugger[-1].get("status") == "approved"
+
+def store(key: str, request: str, before: dict[str, str], final: dict):
+    """Records what the run changed in the workspace and the resulting mind files."""
+    root, mind_root = get_workspace_root(), get_mind_root()
+    after = snapshot()
+    written = {
+        rel: base64.b64encode((root / rel).read_bytes()).decode("ascii")
+        for rel, file_hash in after.items() if before.get(rel) != file_hash
+    }
+    entry = {
+        "version": CACHE_VERSION,
+        "key": key,
+        "request": normalize_request(request),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "written": written,
+        "deleted": sorted(set(before) - set(after)),
+        "mind": {
+            name: (mind_root / name).read_text(encoding="utf-8")
+            for name in MIND_FILES if (mind_root / name).exists()
+        },
+        "state": {k: final[k] for k in STATE_KEYS if k in final}
+    }
+
+    path = _cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so concurrent runs never read a half-written entry
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".run-", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+def _safe_path(root: Path, rel: str) -> Path:
+    full_path = root / rel
+    if not full_path.resolve().is_relative_to(root.resolve()):
+        raise ValueError(f"Access denied: {rel} outside workspace")
+    return full_path
+
+def replay(entry: dict) -> dict:
+    """Applies a cached run to the current workspace + mind and returns its final state."""
+    root, mind_root = get_workspace_root(), get_mind_root()
+    for rel in entry["deleted"]:
+        path = _safe_path(root, rel)
+        if path.exists():
+            path.unlink()
+    for rel, data in entry["written"].items():
+        path = _safe_path(root, rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(base64.b64decode(data))
+    mind_root.mkdir(parents=True, exist_ok=True)
+    for name, text in entry["mind"].items():
+        (mind_root / name).write_text(text, encoding="utf-8")
+    return entry["state"]
+
+def invalidate(request: str) -> bool:
+    """Drops the entry for `request` against the current workspace + mind."""
+    path = _cache_path(run_key(request))
+    if path.exists():
+        path.unlink()
+        return True
+    return False
+
+def clear_run_cache() -> int:
+    """Removes every cached run. Returns how many entries were dropped."""
+    # Only our own entries: RUN_CACHE_DIR may point at a directory shared with other tools
+    cache_dir = Path(config.RUN_CACHE_DIR)
+    if not cache_dir.exists():
+        return 0
+    count = 0
+    for entry in cache_dir.glob("*.json"):
+        if re.fullmatch(r"[0-9a-f]{64}\.json", entry.name):
+            entry.unlink(missing_ok=True)
+            count += 1
+    for leftover in cache_dir.glob(".run-*.tmp"):
+        leftover.unlink(missing_ok=True)  # Interrupted store() writes
+    return count
+
+def cached_run(request: str, run_fn, bypass: bool = False) -> tuple[dict, str]:
+    """
+    Runs `run_fn()` (which returns the final graph state) unless an identical run is cached.
+    Returns (final_state, "hit" | "miss" | "bypass").
+    """
+    if bypass or not config.RUN_CACHE_ENABLED:
+        return run_fn(), "bypass"
+
+    before = snapshot()
+    key = run_key(request, before)
+    entry = lookup(key)
+    if entry and entry.get("version") == CACHE_VERSION:
+        print("   > ♻️ Identical request + workspace seen before: replaying cached result")
+        return replay(entry), "hit"
+
+    final = run_fn()
+    if cacheable(final):
+        store(key, request, before, final)
+    return final, "miss"
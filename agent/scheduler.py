@@ -0,0 +1,206 @@
+"""
+Client-side scheduler for model calls.
+Every LLM call goes through one shared ModelScheduler, which enforces requests/tokens
+per minute (token buckets), bounded concurrency, interactive-before-batch priority, and
+retries transient errors (429, 5xx, connection drops) with jittered exponential backoff.
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from agent import config
+
+# Priorities (lower runs first)
+INTERACTIVE = 0
+BATCH = 1
+
+_priority: ContextVar[int] = ContextVar("model_priority", default=INTERACTIVE)
+
+@contextmanager
+def use_priority(priority: int):
+    """Model calls made in this context queue at `priority` (e.g. BATCH for batch runs)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERRORS = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError",
+    "OverloadedError", "ConnectError", "ReadTimeout", "RemoteProtocolError", "TimeoutError"
+}
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, overloads and connection problems are worth retrying; bad requests are not."""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds from the provider's Retry-After header, if it sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` units per second up to `per_minute`."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (requests bigger than the bucket wait for a full one)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Returns (or, if negative, additionally charges) tokens after the real usage is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class ModelScheduler:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._active = 0
+
+    def _acquire(self, estimated_tokens: int, priority: int):
+        """Blocks until this call is at the head of the queue and the limits allow it."""
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    if self._queue[0] == ticket and self._active < self.max_concurrency:
+                        wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self.requests.take(1)
+                            self.tokens.take(estimated_tokens)
+                            self._active += 1
+                            self._cond.notify_all()
+                            return
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+
+    def _release(self, estimated_tokens: int, used_tokens: int | None):
+        with self._cond:
+            self._active -= 1
+            if used_tokens is not None:
+                self.tokens.give_back(estimated_tokens - used_tokens)
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the provider's Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after(error) or 0.0)
+
+    def call(self, fn, estimated_tokens: int, priority: int | None = None):
+        """Runs `fn()` under the limits, retrying transient failures."""
+        priority = _priority.get() if priority is None else priority
+        attempt = 0
+        while True:
+            self._acquire(estimated_tokens, priority)
+            used_tokens = None
+            try:
+                result = fn()
+                used_tokens = _used_tokens(result)
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                print(f"   > ⏳ Model call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            finally:
+                self._release(estimated_tokens, used_tokens)
+            time.sleep(delay)
+
+def _used_tokens(result) -> int | None:
+    usage = getattr(result, "usage_metadata", None) or {}
+    total = usage.get("total_tokens") if isinstance(usage, dict) else None
+    return total if isinstance(total, int) else None
+
+def estimate_tokens(messages, max_tokens: int) -> int:
+    """Prompt size (~4 chars per token) plus the worst-case completion."""
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return chars // 4 + max_tokens
+
+class ScheduledModel:
+    """Wraps a chat model so `invoke` goes through the scheduler. Everything else passes through."""
+
+    def __init__(self, model, scheduler: ModelScheduler, max_tokens: int):
+        self._model = model
+        self._scheduler = scheduler
+        self._max_tokens = max_tokens
+
+    def invoke(self, messages, *args, **kwargs):
+        return self._scheduler.call(
+            lambda: self._model.invoke(messages, *args, **kwargs),
+            estimate_tokens(messages, self._max_tokens)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> ModelScheduler:
+    """The process-wide scheduler, built from agent.config on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ModelScheduler(
+                requests_per_minute=config.MODEL_REQUESTS_PER_MINUTE,
+                tokens_per_minute=config.MODEL_TOKENS_PER_MINUTE,
+                max_concurrency=config.MODEL_MAX_CONCURRENCY,
+                max_retries=config.MODEL_MAX_RETRIES,
+                base_delay=config.MODEL_RETRY_BASE_DELAY,
+                max_delay=config.MODEL_RETRY_MAX_DELAY
+            )
+        return _scheduler
@@ -1,3 +1,4 @@
+import operator
 from typing import TypedDict, Annotated, Optional
 from langgraph.graph import add_messages
 
@@ -11,16 +12,23 @@ class AgentState(TypedDict):
     
     # Prompt Optimizer outputs
     branch_decision: str  # "architect" | "dev_loop"
-    context: str  # FULL manifest + memory injected here
+    context: str  # compact manifest + memory (agent/context.py)
     
     # Architect outputs
     plan: Optional[str]  # <--- CHANGED FROM technical_spec TO plan
+    plan_steps: list[dict]  # id, task, files (owned), depends_on
+    
+    # Plan fan-out (parallel step coders)
+    completed_steps: list[int]
+    step_results: Annotated[list, operator.add]  # appended to concurrently by step coders
     
     # Dev Loop outputs
     dev_loop_complete: bool
     dev_iterations: int
     debug_feedback: Optional[str]
     debug_history: list[dict]
+    iteration_budget: int  # grows while failures shrink (see agent/convergence.py)
+    escalate: bool  # set when the loop stalls: Coder must try a different approach
     
     # Finalizer outputs
     memory_update: dict 
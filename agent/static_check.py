@@ -0,0 +1,227 @@
+"""
+Cheap static checks the Debugger runs before executing any tests:
+  - undefined names (symtable), e.g. a typo or a missing import
+  - unresolved workspace imports: missing workspace module, or a name that module doesn't define
+  - attribute access on an imported workspace module that it doesn't define (utils.missing())
+  - duplicate top-level / class-level definitions
+Findings go straight back to the Coder, no LLM call needed.
+"""
+import ast
+import builtins
+import symtable
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePath
+
+BUILTIN_NAMES = set(dir(builtins)) | {
+    "__file__", "__name__", "__doc__", "__builtins__", "__spec__", "__loader__",
+    "__package__", "__path__", "__annotations__", "__cached__", "__dict__", "__module__", "__qualname__"
+}
+# Attributes every module has, whether or not its source mentions them
+MODULE_DUNDERS = {
+    "__name__", "__file__", "__doc__", "__spec__", "__loader__", "__package__", "__path__",
+    "__dict__", "__builtins__", "__cached__", "__annotations__"
+}
+# Decorators that legitimately redefine a name (property setters, overloads, singledispatch)
+_REDEFINING_DECORATORS = ("setter", "getter", "deleter", "overload", "register")
+
+class WorkspaceModules:
+    """Top-level names of every Python module in the workspace, addressable by dotted name."""
+
+    def __init__(self, sources: dict[str, str]):
+        self.names: dict[str, set[str] | None] = {}   # dotted -> defined names (None = can't tell)
+        self.paths: dict[str, str] = {}               # dotted -> relative path
+        self.packages: set[str] = set()               # dotted names of directories holding modules
+        for rel, source in sources.items():
+            dotted = self.dotted(rel)
+            try:
+                tree = ast.parse(source)
+            except SyntaxError:
+                continue
+            self.names[dotted] = top_level_names(tree, source)
+            self.paths[dotted] = rel
+            parts = dotted.split(".")
+            for i in range(1, len(parts)):
+                self.packages.add(".".join(parts[:i]))
+        # A package's names include its submodules
+        for dotted in list(self.names):
+            parent, _, child = dotted.rpartition(".")
+            if parent in self.names and self.names[parent] is not None:
+                self.names[parent].add(child)
+
+    @staticmethod
+    def dotted(rel: str) -> str:
+        parts = list(PurePath(rel.replace("\\", "/")).with_suffix("").parts)
+        if parts and parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(parts)
+
+    def resolve(self, module: str, importer: str) -> str | None:
+        """
+        Workspace module `module` refers to when imported from `importer`: the importer's
+        own folder first (that's sys.path[0] when a file is run directly), then the root.
+        """
+        folder = self.dotted(importer).rpartition(".")[0]
+        for candidate in ([f"{folder}.{module}"] if folder else []) + [module]:
+            if candidate in self.names or candidate in self.packages:
+                return candidate
+        return None
+
+    def looks_local(self, module: str, importer: str) -> bool:
+        """True if `module` points into the workspace (its top package is a workspace folder/module)."""
+        head = module.split(".")[0]
+        if head in sys.stdlib_module_names:
+            return False
+        folder = self.dotted(importer).rpartition(".")[0]
+        heads = [f"{folder}.{head}"] if folder else []
+        return any(h in self.names or h in self.packages for h in heads + [head])
+
+def top_level_names(tree: ast.Module, source: str) -> set[str] | None:
+    """Names a module defines at top level (None if it can't be known: star import / __getattr__)."""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names):
+            return None
+    table = symtable.symtable(source, "<module>", "exec")
+    for symbol in table.get_symbols():
+        if symbol.is_assigned() or symbol.is_imported() or symbol.is_namespace():
+            names.add(symbol.get_name())
+
+    # Nested scopes can bind module names too: `global x; x = ...` in a function, and
+    # walrus targets in module-level comprehensions (`[y for x in xs if (y := x)]`)
+    def nested(scope):
+        for child in scope.get_children():
+            names.update(s.get_name() for s in child.get_symbols() if s.is_assigned() and s.is_global())
+            nested(child)
+
+    nested(table)
+    if "__getattr__" in names:
+        return None
+    return names | MODULE_DUNDERS
+
+def _first_line(tree: ast.AST, name: str) -> int | None:
+    lines = [n.lineno for n in ast.walk(tree)
+             if isinstance(n, ast.Name) and n.id == name and isinstance(n.ctx, ast.Load)]
+    return min(lines) if lines else None
+
+def undefined_names(rel: str, source: str, tree: ast.Module) -> list[str]:
+    defined = top_level_names(tree, source)
+    if defined is None:
+        return []  # Star import: can't tell what's defined
+
+    findings, seen = [], set()
+
+    def visit(table):
+        for symbol in table.get_symbols():
+            name = symbol.get_name()
+            if (symbol.is_referenced() and symbol.is_global() and name not in defined
+                    and name not in BUILTIN_NAMES and name not in seen):
+                seen.add(name)
+                line = _first_line(tree, name)
+                where = f"{rel}:{line}" if line else rel
+                findings.append(f"{where}: undefined name '{name}'")
+        for child in table.get_children():
+            visit(child)
+
+    visit(symtable.symtable(source, rel, "exec"))
+    return findings
+
+def import_problems(rel: str, tree: ast.Module, modules: WorkspaceModules) -> list[str]:
+    findings = []
+    module_aliases = {}  # local name -> workspace module, for attribute checks
+
+    def check_names(target: str, names: list[ast.alias], line: int):
+        defined = modules.names.get(target)
+        if defined is None:
+            return
+        for alias in names:
+            if alias.name not in defined:
+                findings.append(
+                    f"{rel}:{line}: '{alias.name}' is not defined in {modules.paths.get(target, target)}"
+                )
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                target = modules.resolve(alias.name, rel)
+                if target is None and modules.looks_local(alias.name, rel):
+                    findings.append(f"{rel}:{node.lineno}: module '{alias.name}' not found in workspace")
+                elif target is not None and alias.asname and node in tree.body:
+                    module_aliases[alias.asname] = target
+                elif target is not None and "." not in alias.name and node in tree.body:
+                    module_aliases[alias.name] = target
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                # Relative import: resolve against the importing file's package. A package's
+                # __init__ already *is* the package (dotted() drops "__init__"), so it climbs one less
+                parts = modules.dotted(rel).split(".")
+                up = node.level - 1 if PurePath(rel).stem == "__init__" else node.level
+                package = parts[:max(len(parts) - up, 0)]
+                module = ".".join(package + ([node.module] if node.module else []))
+                target = module if module in modules.names or module in modules.packages else None
+                if target is None:
+                    findings.append(f"{rel}:{node.lineno}: module '{'.' * node.level}{node.module or ''}' not found in workspace")
+                    continue
+            else:
+                target = modules.resolve(node.module or "", rel)
+                if target is None:
+                    if modules.looks_local(node.module or "", rel):
+                        findings.append(f"{rel}:{node.lineno}: module '{node.module}' not found in workspace")
+                    continue
+            if any(a.name == "*" for a in node.names):
+                continue
+            check_names(target, node.names, node.lineno)
+
+    # utils.missing() where `import utils` is a workspace module
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load)
+                and isinstance(node.value, ast.Name) and node.value.id in module_aliases):
+            target = module_aliases[node.value.id]
+            defined = modules.names.get(target)
+            if defined is not None and node.attr not in defined:
+                findings.append(f"{rel}:{node.lineno}: {node.value.id}.{node.attr} does not exist "
+                                f"in {modules.paths.get(target, target)}")
+    return findings
+
+def duplicate_definitions(rel: str, tree: ast.Module) -> list[str]:
+    findings = []
+
+    def check_body(body: list, scope: str):
+        first_seen = {}
+        for node in body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            decorators = [ast.unparse(d) for d in node.decorator_list]
+            if any(d.endswith(_REDEFINING_DECORATORS) for d in decorators):
+                continue
+            if node.name in first_seen:
+                findings.append(f"{rel}:{node.lineno}: duplicate definition of {scope}{node.name} "
+                                f"(first defined on line {first_seen[node.name]})")
+            else:
+                first_seen[node.name] = node.lineno
+            if isinstance(node, ast.ClassDef):
+                check_body(node.body, f"{node.name}.")
+
+    check_body(tree.body, "")
+    return findings
+
+def check_file(rel: str, source: str, modules: WorkspaceModules) -> list[str]:
+    """All findings for one file (syntax errors are the Debugger's pre-check, not ours)."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+    return (undefined_names(rel, source, tree)
+            + import_problems(rel, tree, modules)
+            + duplicate_definitions(rel, tree))
+
+def static_check(sources: dict[str, str], targets: list[str] | None = None, workers: int = 4) -> list[str]:
+    """
+    Checks `targets` (default: every .py file in `sources`) against the whole workspace.
+    `sources` maps relative path -> source for every Python file in the workspace.
+    """
+    modules = WorkspaceModules(sources)
+    targets = [t for t in (targets or sources) if t in sources]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets) or 1))) as pool:
+        results = pool.map(lambda rel: check_file(rel, sources[rel], modules), targets)
+    return [finding for findings in results for finding in findings]
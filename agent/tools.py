@@ -1,8 +1,19 @@
+import mmap
 import os
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 import json
 import shutil
+import signal
 import subprocess
+import sys
+import threading
+import time
+from agent import config
+from agent.code_index import index_for
 
 # Define the root of the workspace (Safety Sandbox)
 WORKSPACE_ROOT = Path(__file__).parent.parent / "workspace"
@@ -10,36 +21,159 @@ WORKSPACE_ROOT = Path(__file__).parent.parent / "workspace"
 # Define the root for memory/manifest
 MIND_ROOT = Path(__file__).parent.parent / "mind"
 
+# Per-run overrides (batch runs give every request its own workspace + mind)
+_workspace_root: ContextVar[Path] = ContextVar("workspace_root", default=WORKSPACE_ROOT)
+_mind_root: ContextVar[Path] = ContextVar("mind_root", default=MIND_ROOT)
+
+def get_workspace_root() -> Path:
+    """Returns the workspace root for the current run."""
+    return _workspace_root.get()
+
+def get_mind_root() -> Path:
+    """Returns the mind (manifest/memory) root for the current run."""
+    return _mind_root.get()
+
+@contextmanager
+def use_workspace(workspace_root, mind_root=None):
+    """Points every tool at another workspace (and optionally mind) for this context."""
+    ws_token = _workspace_root.set(Path(workspace_root))
+    mind_token = _mind_root.set(Path(mind_root)) if mind_root is not None else None
+    try:
+        yield
+    finally:
+        if mind_token is not None:
+            _mind_root.reset(mind_token)
+        _workspace_root.reset(ws_token)
+
 # --- WORKSPACE TOOLS (Safe File Operations) ---
 
-def read_file(filepath: str) -> str:
-    """Safely read a file from workspace with UTF-8 encoding and fallback."""
-    full_path = WORKSPACE_ROOT / filepath
-    
+# Decoded text, keyed by resolved path and validated by (mtime, size); bounded in bytes
+_text_cache: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+_text_cache_bytes = 0
+_text_cache_lock = threading.Lock()
+BINARY_SNIFF_BYTES = 8192
+# Above this, files are decoded straight from a memory map (no intermediate bytes copy)
+MMAP_THRESHOLD_BYTES = 1 << 20
+
+def _resolve_in_workspace(filepath: str) -> Path:
+    workspace_root = get_workspace_root()
+    full_path = workspace_root / filepath
+
     # Security: Prevent path traversal
-    if not full_path.resolve().is_relative_to(WORKSPACE_ROOT.resolve()):
+    if not full_path.resolve().is_relative_to(workspace_root.resolve()):
         raise ValueError(f"Access denied: {filepath} outside workspace")
-    
+
     if not full_path.exists():
         raise FileNotFoundError(f"{filepath} not found")
-    
+    return full_path
+
+def _looks_binary(block: bytes) -> bool:
+    """NUL bytes, or mostly non-text control characters, in the first block."""
+    if not block:
+        return False
+    if b"\0" in block:
+        return True
+    control = sum(1 for b in block if b < 32 and b not in (9, 10, 12, 13, 27))
+    return control / len(block) > 0.3
+
+def is_binary_file(filepath: str) -> bool:
+    """True if the workspace file looks binary (sniffed from its first block only)."""
+    with _resolve_in_workspace(filepath).open("rb") as f:
+        return _looks_binary(f.read(BINARY_SNIFF_BYTES))
+
+def _decode(full_path: Path, size: int, encoding: str) -> str:
+    if size == 0:
+        return ""
+    with full_path.open("rb") as f:
+        if size < MMAP_THRESHOLD_BYTES:
+            return f.read().decode(encoding)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, encoding)
+
+def _cache_text(key: str, mtime: int, size: int, text: str):
+    global _text_cache_bytes
+    limit = config.READ_CACHE_BYTES
+    if size > limit // 4:
+        return  # One big file would evict everything else
+    with _text_cache_lock:
+        old = _text_cache.pop(key, None)
+        if old:
+            _text_cache_bytes -= old[1]
+        _text_cache[key] = (mtime, size, text)
+        _text_cache_bytes += size
+        while _text_cache_bytes > limit and _text_cache:
+            _, (_, evicted, _) = _text_cache.popitem(last=False)
+            _text_cache_bytes -= evicted
+
+def _forget_text(full_path: Path):
+    global _text_cache_bytes
+    with _text_cache_lock:
+        old = _text_cache.pop(str(full_path.resolve()), None)
+        if old:
+            _text_cache_bytes -= old[1]
+
+def read_file(filepath: str) -> str:
+    """Safely read a file from workspace with UTF-8 encoding and fallback (binary files are not decoded)."""
+    full_path = _resolve_in_workspace(filepath)
+    stat = full_path.stat()
+    key = str(full_path.resolve())
+
+    with _text_cache_lock:
+        cached = _text_cache.get(key)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            _text_cache.move_to_end(key)
+            return cached[2]
+
+    if is_binary_file(filepath):
+        return f"[BINARY FILE: {filepath}, {stat.st_size} bytes]"
+
     # Try UTF-8 first, fallback to latin-1 if it fails
     try:
-        return full_path.read_text(encoding="utf-8")
+        text = _decode(full_path, stat.st_size, "utf-8")
     except UnicodeDecodeError:
         print(f"   > ⚠️ Warning: {filepath} has encoding issues, using latin-1 fallback")
         try:
-            return full_path.read_text(encoding="latin-1")
+            text = _decode(full_path, stat.st_size, "latin-1")
         except Exception as e:
             print(f"   > ❌ Could not read {filepath}: {e}")
             return f"[FILE READ ERROR: {filepath}]"
 
+    _cache_text(key, stat.st_mtime_ns, stat.st_size, text)
+    return text
+
+def read_preview(filepath: str, max_bytes: int | None = None) -> str:
+    """
+    At most ~`max_bytes` of a file for prompts: whole if small, else head + tail with
+    the middle elided. Large files are never read in full; binary files become a one-liner.
+    """
+    max_bytes = max_bytes or config.READ_PREVIEW_BYTES
+    full_path = _resolve_in_workspace(filepath)
+    size = full_path.stat().st_size
+    if size <= max_bytes:
+        return read_file(filepath)
+
+    head_bytes = max_bytes * 2 // 3
+    tail_bytes = max_bytes - head_bytes
+    with full_path.open("rb") as f:
+        head = f.read(head_bytes)
+        if _looks_binary(head[:BINARY_SNIFF_BYTES]):
+            return f"[BINARY FILE: {filepath}, {size} bytes]"
+        f.seek(size - tail_bytes)
+        tail = f.read(tail_bytes)
+
+    # Cut points can split a multi-byte character; "replace" keeps that to one glyph
+    omitted = size - head_bytes - tail_bytes
+    return (head.decode("utf-8", errors="replace")
+            + f"\n... [{omitted} bytes omitted] ...\n"
+            + tail.decode("utf-8", errors="replace"))
+
 def write_file(filepath: str, content: str) -> None:
     """Safely write a file to workspace with UTF-8 encoding."""
-    full_path = WORKSPACE_ROOT / filepath
+    workspace_root = get_workspace_root()
+    full_path = workspace_root / filepath
     
     # Security check
-    if not full_path.resolve().is_relative_to(WORKSPACE_ROOT.resolve()):
+    if not full_path.resolve().is_relative_to(workspace_root.resolve()):
         raise ValueError(f"Access denied: {filepath} outside workspace")
     
     # Create parent directories if needed
@@ -53,28 +187,40 @@ def write_file(filepath: str, content: str) -> None:
     except UnicodeEncodeError:
         # If content has weird characters, clean them
         print(f"   > ⚠️ Warning: Cleaning non-UTF-8 characters from {filepath}")
-        clean_content = content.encode('utf-8', errors='ignore').decode('utf-8')
-        full_path.write_text(clean_content, encoding="utf-8")
+        content = content.encode('utf-8', errors='ignore').decode('utf-8')
+        full_path.write_text(content, encoding="utf-8")
+    _forget_text(full_path)
+
+    # Keep the code outline current without re-reading the file later
+    if full_path.suffix == ".py":
+        rel = str(full_path.resolve().relative_to(workspace_root.resolve()))
+        index_for(workspace_root).update_file(rel, content)
 
 def list_files(directory: str = ".") -> list[str]:
     """List files in workspace directory."""
-    full_path = WORKSPACE_ROOT / directory
+    workspace_root = get_workspace_root()
+    full_path = workspace_root / directory
     
-    if not full_path.resolve().is_relative_to(WORKSPACE_ROOT.resolve()):
+    if not full_path.resolve().is_relative_to(workspace_root.resolve()):
         raise ValueError(f"Access denied: {directory} outside workspace")
     
     if not full_path.exists():
         return []
     
     # Return relative paths
-    return [str(p.relative_to(WORKSPACE_ROOT)) for p in full_path.rglob("*") if p.is_file()]
+    return [str(p.relative_to(workspace_root)) for p in full_path.rglob("*") if p.is_file()]
+
+def workspace_outline(budget_tokens: int = 1500) -> str:
+    """Files plus the structure of every Python module (see agent/code_index.py)."""
+    return index_for(get_workspace_root()).outline(budget_tokens)
 
 # --- MIND TOOLS (Internal System Use Only) ---
 
 def load_mind_files() -> tuple[dict, dict]:
     """Loads both manifest and memory."""
-    manifest_path = MIND_ROOT / "manifest.json"
-    memory_path = MIND_ROOT / "memory.json"
+    mind_root = get_mind_root()
+    manifest_path = mind_root / "manifest.json"
+    memory_path = mind_root / "memory.json"
     
     # Defaults if missing
     if not manifest_path.exists():
@@ -99,24 +245,28 @@ def load_mind_files() -> tuple[dict, dict]:
 
 def update_memory(new_memory: dict) -> None:
     """Used by Finalizer to save state."""
-    MIND_ROOT.mkdir(parents=True, exist_ok=True)
-    memory_path = MIND_ROOT / "memory.json"
+    mind_root = get_mind_root()
+    mind_root.mkdir(parents=True, exist_ok=True)
+    memory_path = mind_root / "memory.json"
     memory_path.write_text(json.dumps(new_memory, indent=2), encoding="utf-8")
 
 def reset_project_memory() -> str:
     """Wipes workspace and resets Mind files."""
-    if WORKSPACE_ROOT.exists():
-        shutil.rmtree(WORKSPACE_ROOT)
-    WORKSPACE_ROOT.mkdir(exist_ok=True)
+    workspace_root = get_workspace_root()
+    mind_root = get_mind_root()
+    if workspace_root.exists():
+        shutil.rmtree(workspace_root)
+    index_for(workspace_root).clear()
+    workspace_root.mkdir(parents=True, exist_ok=True)
     
-    MIND_ROOT.mkdir(parents=True, exist_ok=True)
+    mind_root.mkdir(parents=True, exist_ok=True)
 
     default_manifest = {
         "project_name": "New Project",
         "tech_stack": [],
         "rules": []
     }
-    (MIND_ROOT / "manifest.json").write_text(json.dumps(default_manifest, indent=2), encoding="utf-8")
+    (mind_root / "manifest.json").write_text(json.dumps(default_manifest, indent=2), encoding="utf-8")
 
     default_memory = {
         "pending_tasks": [],
@@ -124,36 +274,245 @@ def reset_project_memory() -> str:
         "known_files": [],
         "error_log": []
     }
-    (MIND_ROOT / "memory.json").write_text(json.dumps(default_memory, indent=2), encoding="utf-8")
+    (mind_root / "memory.json").write_text(json.dumps(default_memory, indent=2), encoding="utf-8")
     
     return "Memory wiped. Workspace cleared. Ready for new project."
 
-def run_command(command: str) -> str:
-    """Executes a terminal command in the workspace with robust encoding handling."""
+class BoundedBuffer:
+    """Keeps the first `head_bytes` and the last `tail_bytes` of a stream; the middle is only counted."""
+
+    def __init__(self, head_bytes: int, tail_bytes: int):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def feed(self, chunk: bytes):
+        self.total += len(chunk)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk:
+            self.tail += chunk
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.head) + len(self.tail)
+
+    def text(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if not self.truncated:
+            return head + tail
+        omitted = self.total - len(self.head) - len(self.tail)
+        return f"{head}\n... [{omitted} bytes omitted] ...\n{tail}"
+
+def _drain(pipe, buffer: BoundedBuffer):
+    """Reader thread: pulls a pipe into its bounded buffer until EOF."""
+    try:
+        while True:
+            chunk = os.read(pipe.fileno(), 65536)
+            if not chunk:
+                break
+            buffer.feed(chunk)
+    except (OSError, ValueError):
+        pass  # Pipe closed underneath us (process killed)
+
+def _kill_process_group(proc: subprocess.Popen):
+    """Kills the command and anything it spawned, so no orphans outlive the run."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+# --- SANDBOX (resource-governed execution of generated code) ---
+
+_SANDBOX_LAUNCHER = Path(__file__).with_name("_sandbox_exec.py")
+
+# Global cap on concurrently running commands, shared by every session in this process
+_sandbox_slots = threading.BoundedSemaphore(config.SANDBOX_MAX_CONCURRENT)
+
+def _user_task_count() -> int | None:
+    """Processes + threads owned by this user (what RLIMIT_NPROC counts); None if unknown."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    uid, total = os.getuid(), 0
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            if entry.stat().st_uid == uid:
+                total += sum(1 for _ in (entry / "task").iterdir())
+        except OSError:
+            continue  # Exited while we were counting
+    return total
+
+def sandbox_limits() -> dict:
+    """rlimits applied to every command (names from the `resource` module, 0 = unlimited)."""
+    nproc = 0
+    if config.SANDBOX_MAX_PROCESSES:
+        current = _user_task_count()
+        nproc = current + config.SANDBOX_MAX_PROCESSES if current is not None else 0
+    return {
+        "RLIMIT_CPU": config.SANDBOX_CPU_SECONDS,
+        "RLIMIT_AS": config.SANDBOX_MEMORY_MB * 1024 * 1024,
+        "RLIMIT_NOFILE": config.SANDBOX_MAX_OPEN_FILES,
+        "RLIMIT_NPROC": nproc
+    }
+
+def _wait_with_usage(proc: subprocess.Popen, box: dict):
+    """Waiter thread: reaps the command with wait4 so we get its resource usage."""
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    box["usage"] = usage
+
+def _limits_hit(returncode: int | None, stderr: str, cpu_seconds: float | None) -> list[str]:
+    """Best guess at which sandbox limit stopped the run."""
+    hit = []
+    signum = -returncode if returncode is not None and returncode < 0 else (
+        returncode - 128 if returncode is not None and returncode > 128 else None)
+    if signum == getattr(signal, "SIGXCPU", None) or (
+            config.SANDBOX_CPU_SECONDS and cpu_seconds and cpu_seconds >= config.SANDBOX_CPU_SECONDS):
+        hit.append("cpu")
+    if "MemoryError" in stderr or "Cannot allocate memory" in stderr:
+        hit.append("memory")
+    if "Too many open files" in stderr:
+        hit.append("open_files")
+    # fork()/clone() failing with EAGAIN, as reported by sh, Python and the threading module
+    if any(marker in stderr for marker in (
+            "Resource temporarily unavailable", "Cannot fork", "[Errno 11]", "can't start new thread")):
+        hit.append("processes")
+    return hit
+
+def execute(command: str, timeout: float | None = None) -> dict:
+    """
+    Runs a shell command in the workspace sandbox: rlimits (CPU, memory, open files,
+    processes) on POSIX, a global cap on concurrent runs, and stdout/stderr streamed into
+    bounded buffers. Returns exit_code (None on timeout), output, byte totals, elapsed
+    seconds and resource usage.
+    """
+    timeout = timeout or config.RUN_TIMEOUT_SECONDS
+    buffers = {
+        name: BoundedBuffer(config.RUN_OUTPUT_HEAD_BYTES, config.RUN_OUTPUT_TAIL_BYTES)
+        for name in ("stdout", "stderr")
+    }
+    posix = os.name == "posix"
+    if posix:
+        args, shell = [sys.executable, "-I", "-S", str(_SANDBOX_LAUNCHER), json.dumps(sandbox_limits()), command], False
+        popen_kwargs = {"start_new_session": True}
+    else:
+        args, shell = command, True
+        popen_kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+    queued = time.perf_counter()
+    with _sandbox_slots:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            args,
+            cwd=get_workspace_root(),
+            shell=shell,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **popen_kwargs
+        )
+        readers = [
+            threading.Thread(target=_drain, args=(proc.stdout, buffers["stdout"]), daemon=True),
+            threading.Thread(target=_drain, args=(proc.stderr, buffers["stderr"]), daemon=True)
+        ]
+        box = {}
+        waiter = threading.Thread(target=_wait_with_usage, args=(proc, box), daemon=True) if posix else None
+        for thread in readers + ([waiter] if waiter else []):
+            thread.start()
+
+        timed_out = False
+        try:
+            if waiter:
+                waiter.join(timeout)
+                timed_out = waiter.is_alive()
+            else:
+                proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+        finally:
+            # Also reaps background children a finished test left behind
+            _kill_process_group(proc)
+            if waiter:
+                waiter.join()
+            else:
+                proc.wait()
+            for reader in readers:
+                reader.join(timeout=1)
+            proc.stdout.close()
+            proc.stderr.close()
+        elapsed = time.perf_counter() - started
+
+    usage = box.get("usage")
+    cpu_seconds = round(usage.ru_utime + usage.ru_stime, 3) if usage else None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss_kb = (usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss) if usage else None
+    stderr = buffers["stderr"].text()
+
+    return {
+        "exit_code": None if timed_out else proc.returncode,
+        "timed_out": timed_out,
+        "timeout": timeout,
+        "stdout": buffers["stdout"].text(),
+        "stderr": stderr,
+        "stdout_bytes": buffers["stdout"].total,
+        "stderr_bytes": buffers["stderr"].total,
+        "truncated": buffers["stdout"].truncated or buffers["stderr"].truncated,
+        "elapsed": round(elapsed, 3),
+        "queued": round(started - queued, 3),
+        "cpu_seconds": cpu_seconds,
+        "max_rss_kb": max_rss_kb,
+        "limits_hit": _limits_hit(proc.returncode, stderr, cpu_seconds)
+    }
+
+def format_result(result: dict) -> str:
+    """Renders an execute() result the way the Debugger (and the LLM) reads it."""
+    stats = (f"ELAPSED: {result['elapsed']}s | OUTPUT: {result['stdout_bytes']} bytes stdout, "
+             f"{result['stderr_bytes']} bytes stderr" + (" (truncated)" if result["truncated"] else ""))
+    if result["cpu_seconds"] is not None:
+        stats += f"\nRESOURCES: {result['cpu_seconds']}s CPU, {result['max_rss_kb'] / 1024:.1f} MB peak RSS"
+    if result["limits_hit"]:
+        stats += f"\nSANDBOX LIMITS HIT: {', '.join(result['limits_hit'])}"
+    if result["timed_out"]:
+        header = f"Error: Execution timed out after {result['timeout']:g}s (infinite loop?)."
+    else:
+        header = f"EXIT CODE: {result['exit_code']}"
+
+    return f"{header}\n{stats}\nSTDOUT:\n{result['stdout']}\nSTDERR:\n{result['stderr']}"
+
+def run_command_detailed(command: str) -> tuple[str, dict | None]:
+    """run_command, plus the raw execute() result (None if the command never ran)."""
     forbidden = ["rm -rf /", "format", "sudo"]
     if any(bad in command for bad in forbidden):
-        return "Error: Command blocked for security."
-        
+        return "Error: Command blocked for security.", None
+
     try:
-        result = subprocess.run(
-            command,
-            cwd=WORKSPACE_ROOT,
-            shell=True,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors='replace',  # Replace bad chars instead of crashing
-            timeout=10 
-        )
-        
-        # Clean output to ensure it's safe
-        stdout = result.stdout if result.stdout else ""
-        stderr = result.stderr if result.stderr else ""
-        
-        output = f"EXIT CODE: {result.returncode}\nSTDOUT:\n{stdout}\nSTDERR:\n{stderr}"
-        return output
-        
-    except subprocess.TimeoutExpired:
-        return "Error: Execution timed out (infinite loop?)."
+        result = execute(command)
     except Exception as e:
-        return f"System Error: {str(e)}"
+        return f"System Error: {str(e)}", None
+    return format_result(result), result
+
+def run_command(command: str) -> str:
+    """Executes a terminal command in the workspace sandbox with bounded, streamed output capture."""
+    return run_command_detailed(command)[0]
+
+def find_test_files(files: list[str]) -> list[str]:
+    """Picks out the files the Debugger runs as tests."""
+    return [f for f in files if "test" in f.lower() or "t_" in f.lower()]
+
+def exit_code_of(output: str) -> int | None:
+    """Reads the exit code back out of a run_command result (None if it never ran/finished)."""
+    match = re.match(r"EXIT CODE: (-?\d+)", output)
+    return int(match.group(1)) if match else None
@@ -1,6 +1,38 @@
+import json
+import urllib.error
+import urllib.request
 import streamlit as st
-from main import app  # Import your compiled graph
 from pathlib import Path
+from agent import config
+
+# The graph runs in the job service (python server.py); this page is only a client
+SERVICE_URL = config.SERVICE_URL.rstrip("/")
+
+def submit_job(request: str) -> dict:
+    """Queues a request on the job service and returns the job record."""
+    req = urllib.request.Request(
+        f"{SERVICE_URL}/jobs",
+        data=json.dumps({"request": request}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read())
+
+def stream_job_events(job_id: str):
+    """Yields {node: update} events like graph.stream(), then the finished job record."""
+    # The service sends a keepalive line every ~15s, so the timeout only trips on a dead connection
+    with urllib.request.urlopen(f"{SERVICE_URL}/jobs/{job_id}/events", timeout=120) as resp:
+        for line in resp:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if message.get("keepalive"):
+                continue
+            if "job" in message:
+                yield "job", message["job"]
+            else:
+                yield "event", {message["node"]: message["update"]}
 
 st.set_page_config(page_title="Autonomous Coding Agent", page_icon="🤖", layout="wide")
 
@@ -72,20 +104,28 @@ if prompt := st.chat_input("What should I build?"):
         status_container = st.status("🤔 Agent is working...", expanded=True)
         
         try:
-            # Prepare the initial state
-            initial_state = {
-                "request": prompt, 
-                "dev_iterations": 0, 
-                "debug_history": [],
-                "messages": []
-            }
+            # Queue the request on the job service
+            job = submit_job(prompt)
+            status_container.write(f"📥 Queued as job {job['id']}.")
             
-            # Stream the events from the graph
+            # Stream the node events from the service
             final_state = None
             response = None  # Initialize response variable
             
-            # We use .stream() to get updates as they happen
-            for event in app.stream(initial_state):
+            # Same {node: update} shape as graph.stream(), relayed as NDJSON
+            for kind, event in stream_job_events(job["id"]):
+                if kind == "job":
+                    if event["status"] == "error":
+                        raise RuntimeError(event.get("error") or "Job failed")
+                    break
+
+                # --- ♻️ CACHED RUN (replayed, no nodes ran) ---
+                if "cache" in event:
+                    result = event["cache"]
+                    if not result.get("in_scope", True):
+                        final_state = result
+                        break
+                    status_container.write("♻️ Identical request seen before: replayed the cached result.")
                 
                 # --- 🛡️ BOUNCER ---
                 if "bouncer" in event:
@@ -99,6 +139,23 @@ if prompt := st.chat_input("What should I build?"):
                         final_state = result
                         break  # <--- STOP THE SPINNER IMMEDIATELY
                 
+                # --- ⚡ TRIAGE (speculative Bouncer + Optimizer) ---
+                if "triage" in event:
+                    result = event["triage"]
+                    if not result.get("in_scope"):
+                        status_container.update(label="⛔ Request Rejected", state="error", expanded=True)
+                        status_container.write(f"❌ {result.get('rejection_reason', 'Unknown reason')}")
+                        final_state = result
+                        break
+                    status_container.write("✅ Bouncer: Request is in scope.")
+                    decision = result.get("branch_decision", "unknown")
+                    status_container.write(f"🧠 Optimizer: Routing to {'Architect (new feature)' if decision == 'architect' else 'Coder (quick fix)'}.")
+                    if result.get("plan"):
+                        status_container.write("📐 Architect: Plan created.")
+                        with status_container:
+                            with st.expander("📝 View Architect's Plan", expanded=False):
+                                st.markdown(result["plan"])
+
                 # --- 🧠 OPTIMIZER ---
                 if "optimizer" in event:
                     result = event["optimizer"]
@@ -121,6 +178,11 @@ if prompt := st.chat_input("What should I build?"):
                     iteration = result.get("dev_iterations", 0)
                     status_container.write(f"💻 Coder: Code written (iteration {iteration}).")
                 
+                # --- 🔗 PARALLEL PLAN STEPS ---
+                if "step_coder" in event:
+                    for step_result in event["step_coder"].get("step_results", []):
+                        status_container.write(f"💻 Coder: Step {step_result['step']} written ({len(step_result['touched'])} file(s)).")
+
                 # --- 🕵️ DEBUGGER ---
                 if "debugger" in event:
                     result = event["debugger"]
@@ -158,6 +220,16 @@ if prompt := st.chat_input("What should I build?"):
             if response:  # Only add if response was set
                 st.session_state.messages.append({"role": "assistant", "content": response})
 
+        except urllib.error.HTTPError as e:
+            status_container.update(label="💥 Job Rejected by Service", state="error", expanded=False)
+            error_msg = f"The job service refused the request: {e.read().decode('utf-8', 'replace')}"
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})
+        except urllib.error.URLError as e:
+            status_container.update(label="💥 Job service unreachable", state="error", expanded=False)
+            error_msg = f"Could not reach the job service at {SERVICE_URL} ({e}). Start it with `python server.py`."
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})
         except Exception as e:
             status_container.update(label="💥 Error Occurred", state="error", expanded=False)
             error_msg = f"An error occurred: {str(e)}"
@@ -0,0 +1,256 @@
+"""
+Headless batch runner.
+
+Reads one request per line from a JSONL file, runs each through the compiled
+graph in its own isolated workspace, and writes one result per line.
+
+Usage:
+    python batch.py requests.jsonl -o results.jsonl --workers 4
+"""
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import statistics
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Load environment before importing the graph
+load_dotenv()
+
+from main import build_app, new_run_state
+from agent import config
+from agent.profiling import profile_run
+from agent.run_cache import cached_run, clear_run_cache
+from agent.scheduler import BATCH, use_priority
+from agent.tools import use_workspace, reset_project_memory, list_files, get_workspace_root
+
+
+# --- 1. INPUT ---
+
+def load_requests(path: Path) -> list[dict]:
+    """Reads the JSONL input. Each line needs a "request" (or "prompt") field."""
+    requests = []
+    for line_no, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"   > ⚠️ Skipping line {line_no}: invalid JSON ({e})")
+            continue
+
+        text = entry.get("request") or entry.get("prompt")
+        if not text:
+            print(f"   > ⚠️ Skipping line {line_no}: no 'request' field")
+            continue
+
+        requests.append({
+            "request_id": str(entry.get("request_id", f"line-{line_no}")),
+            "request": text,
+            "line": line_no
+        })
+    return requests
+
+
+# --- 2. ISOLATED WORKSPACES ---
+
+def prepare_run_dir(run_dir: Path, seed_workspace: Path | None, seed_mind: Path | None) -> tuple[Path, Path]:
+    """Creates a fresh workspace + mind for one request, optionally seeded from existing ones."""
+    workspace, mind = run_dir / "workspace", run_dir / "mind"
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+
+    with use_workspace(workspace, mind):
+        reset_project_memory()
+
+    if seed_workspace:
+        shutil.copytree(seed_workspace, workspace, dirs_exist_ok=True)
+    if seed_mind:
+        shutil.copytree(seed_mind, mind, dirs_exist_ok=True)
+    return workspace, mind
+
+def file_manifest() -> list[dict]:
+    """Path, size and hash of every file in the current workspace."""
+    root = get_workspace_root()
+    manifest = []
+    for rel in sorted(list_files()):
+        data = (root / rel).read_bytes()
+        manifest.append({
+            "path": rel,
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest()
+        })
+    return manifest
+
+
+# --- 3. SINGLE RUN ---
+
+def classify(final: dict) -> str:
+    """Collapses the final graph state into one outcome label."""
+    if not final.get("in_scope", False):
+        return "rejected"
+    debugger_entries = [e for e in final.get("debug_history", []) if e.get("role") == "debugger"]
+    if debugger_entries:
+        return debugger_entries[-1].get("status", "unknown")
+    return "completed" if final.get("final_summary") else "incomplete"
+
+def _record_error(record: dict, error: Exception):
+    record["outcome"] = "error"
+    record["error"] = f"{type(error).__name__}: {error}"
+    record["traceback"] = traceback.format_exc()
+
+def run_one(graph, entry: dict, runs_dir: Path, seed_workspace: Path | None, seed_mind: Path | None,
+            profile_dir: Path | None = None, bypass_cache: bool = False) -> dict:
+    """Runs one request through the graph and returns its result record."""
+    # The input line keeps run dirs unique even for duplicate ids or ids that sanitize alike ("a/b", "a_b")
+    safe_id = f"{entry['line']:04d}_" + re.sub(r"[^A-Za-z0-9_.-]", "_", entry["request_id"])
+    record = {
+        "request_id": entry["request_id"],
+        "request": entry["request"],
+        "node_timings": []
+    }
+    final = {}
+    started = time.perf_counter()
+
+    def stream_graph() -> dict:
+        last = started
+        for event in graph.stream(new_run_state(entry["request"])):
+            now = time.perf_counter()
+            # Time since the previous step is shared by the nodes that ran in it
+            step_seconds = (now - last) / max(len(event), 1)
+            last = now
+            for node_name, update in event.items():
+                record["node_timings"].append({"node": node_name, "seconds": round(step_seconds, 3)})
+                final.update(update or {})
+        return final
+
+    try:
+        workspace, mind = prepare_run_dir(runs_dir / safe_id, seed_workspace, seed_mind)
+    except Exception as e:
+        # A broken seed or an unwritable runs dir fails this request, not the whole batch
+        _record_error(record, e)
+        record["files"] = []
+    else:
+        record["workspace"] = str(workspace)
+        profiling = profile_run(profile_dir / safe_id) if profile_dir else nullcontext()
+        if profile_dir:
+            record["profile"] = str(profile_dir / safe_id)
+
+        # Batch model calls queue behind interactive sessions
+        with use_workspace(workspace, mind), use_priority(BATCH), profiling:
+            try:
+                final, record["cache"] = cached_run(entry["request"], stream_graph, bypass=bypass_cache)
+                record["outcome"] = classify(final)
+            except Exception as e:
+                _record_error(record, e)
+
+            record["files"] = file_manifest()
+
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    record["dev_iterations"] = final.get("dev_iterations", 0)
+    record["rejection_reason"] = final.get("rejection_reason")
+    record["final_summary"] = final.get("final_summary")
+
+    totals = {}
+    for timing in record["node_timings"]:
+        totals[timing["node"]] = round(totals.get(timing["node"], 0.0) + timing["seconds"], 3)
+    record["node_totals"] = totals
+    return record
+
+
+# --- 4. BATCH ---
+
+def summarize(records: list[dict], wall_seconds: float, workers: int) -> dict:
+    """Throughput and outcome summary for the whole batch."""
+    latencies = sorted(r["elapsed_seconds"] for r in records)
+    outcomes = {}
+    for r in records:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+
+    summary = {
+        "requests": len(records),
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "requests_per_minute": round(len(records) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "outcomes": outcomes,
+        "total_iterations": sum(r["dev_iterations"] for r in records),
+        "cache_hits": sum(1 for r in records if r.get("cache") == "hit")
+    }
+    if latencies:
+        summary["latency_seconds"] = {
+            "mean": round(statistics.mean(latencies), 3),
+            "p50": round(latencies[len(latencies) // 2], 3),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "max": round(latencies[-1], 3)
+        }
+    return summary
+
+def run_batch(graph, requests: list[dict], output: Path, runs_dir: Path, workers: int,
+              seed_workspace: Path | None = None, seed_mind: Path | None = None,
+              profile_dir: Path | None = None, bypass_cache: bool = False) -> dict:
+    """Runs every request on a pool of workers, streaming results to `output` as they finish."""
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    records = []
+    started = time.perf_counter()
+
+    with output.open("w", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        # Entries built outside load_requests() may lack a line number; position works as well
+        futures = {
+            pool.submit(run_one, graph, {"line": position, **entry}, runs_dir, seed_workspace, seed_mind,
+                        profile_dir, bypass_cache): entry
+            for position, entry in enumerate(requests, start=1)
+        }
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            print(f"   > [{len(records)}/{len(requests)}] {record['request_id']}: "
+                  f"{record['outcome']} ({record['elapsed_seconds']}s)")
+
+    return summarize(records, time.perf_counter() - started, workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSONL file of requests through the coding agent.")
+    parser.add_argument("input", type=Path, help="JSONL file, one {\"request_id\", \"request\"} per line")
+    parser.add_argument("-o", "--output", type=Path, default=Path("batch_results.jsonl"))
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--runs-dir", type=Path, default=None,
+                        help="Where isolated per-request workspaces are created (default: batch_runs/<timestamp>)")
+    parser.add_argument("--seed-workspace", type=Path, default=None, help="Copied into every request's workspace")
+    parser.add_argument("--seed-mind", type=Path, default=None, help="Copied into every request's mind folder")
+    parser.add_argument("--speculative", choices=config.SPECULATIVE_MODES, default=config.SPECULATIVE_MODE,
+                        help="Run the Optimizer (and Architect) alongside the Bouncer")
+    parser.add_argument("--fanout", action="store_true", default=config.PLAN_FANOUT,
+                        help="Send independent plan steps to parallel Coder workers")
+    parser.add_argument("--profile", type=Path, default=None, metavar="DIR",
+                        help="Profile every node and write per-request artifacts to DIR/<request_id>")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the graph, ignoring cached runs")
+    parser.add_argument("--clear-cache", action="store_true", help="Drop every cached run before starting")
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        print(f"🗑️ Cleared {clear_run_cache()} cached run(s)")
+
+    runs_dir = args.runs_dir or Path("batch_runs") / time.strftime("%Y%m%d-%H%M%S")
+    requests = load_requests(args.input)
+
+    print(f"🤖 BATCH RUN: {len(requests)} request(s), {args.workers} worker(s)")
+    graph = build_app(speculative=args.speculative, fanout=args.fanout, profile=bool(args.profile))
+    summary = run_batch(graph, requests, args.output, runs_dir, max(1, args.workers),
+                        args.seed_workspace, args.seed_mind, args.profile, args.no_cache)
+
+    summary_path = args.output.with_suffix(".summary.json")
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    print(json.dumps(summary, indent=2))
+    print(f"Results: {args.output}  Summary: {summary_path}")
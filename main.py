@@ -1,10 +1,17 @@
+import argparse
 import os
+import time
+from contextlib import nullcontext
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment before importing nodes
 load_dotenv()
 
 from langgraph.graph import StateGraph, END
+from agent import config
+from agent.profiling import profile_run, profiled
+from agent.run_cache import cached_run, clear_run_cache
 from agent.states import AgentState
 from agent.nodes import (
     validate_scope,
@@ -12,7 +19,11 @@ from agent.nodes import (
     generate_spec,
     coder_node,
     debugger_node,
-    finalizer_node
+    finalizer_node,
+    make_speculative_triage,
+    coder_step_node,
+    dispatch_ready_steps,
+    join_steps_node
 )
 
 # --- 1. DEFINE ROUTING LOGIC ---
@@ -46,73 +57,162 @@ def route_debugger(state: AgentState):
         return "finalizer"
     return "coder"  # Loop back to fix issues
 
-# --- 2. BUILD THE GRAPH ---
+def route_plan(state: AgentState, fanout: bool):
+    """Once a plan exists: one Coder, or fan the ready plan steps out to parallel step coders."""
+    if fanout and len(state.get("plan_steps") or []) > 1:
+        sends = dispatch_ready_steps(state)
+        if sends:
+            return sends
+    return "coder"
 
-workflow = StateGraph(AgentState)
-
-# Add Nodes
-workflow.add_node("bouncer", validate_scope)
-workflow.add_node("optimizer", optimize_prompt_node)
-workflow.add_node("architect", generate_spec)
-workflow.add_node("coder", coder_node)
-workflow.add_node("debugger", debugger_node)
-workflow.add_node("finalizer", finalizer_node)
-
-# Add Edges (The Flow)
-workflow.set_entry_point("bouncer")
-
-# Bouncer -> Optimizer (or Architect if reset) OR End
-workflow.add_conditional_edges(
-    "bouncer",
-    route_bouncer,
-    {
-        "optimizer": "optimizer",
-        "architect": "architect",
-        END: END
-    }
-)
+def route_join(state: AgentState):
+    """Next wave of plan steps, or on to the Debugger once every step is written."""
+    sends = dispatch_ready_steps(state)
+    return sends if sends else "debugger"
 
-# Optimizer -> Architect OR Coder
-workflow.add_conditional_edges(
-    "optimizer",
-    route_optimizer,
-    {
-        "architect": "architect",
-        "coder": "coder"
-    }
-)
+def route_triage(state: AgentState):
+    """Speculative mode: the Triage node already ran the Bouncer + Optimizer (maybe Architect)."""
+    if not state.get("in_scope"):
+        return END
+    if state.get("branch_decision") == "dev_loop":
+        return "coder"
+    if state.get("plan"):
+        # Architect ran speculatively, its plan is already in state
+        return "coder"
+    return "architect"
 
-# Architect -> Coder OR Finalizer (NEW: can skip dev loop for resets)
-workflow.add_conditional_edges(
-    "architect",
-    route_architect,
-    {
-        "coder": "coder",
-        "finalizer": "finalizer"
-    }
-)
+# --- 2. BUILD THE GRAPH ---
 
-# Coder -> Debugger (Always)
-workflow.add_edge("coder", "debugger")
+def build_app(speculative: str = config.SPECULATIVE_MODE, fanout: bool = config.PLAN_FANOUT,
+              profile: bool = False):
+    """
+    Builds and compiles the workflow.
+    `speculative` is one of config.SPECULATIVE_MODES, `fanout` enables parallel plan steps,
+    `profile` wraps every node so it is profiled inside agent.profiling.profile_run().
+    """
+    if speculative not in config.SPECULATIVE_MODES:
+        raise ValueError(f"Unknown speculative mode: {speculative}")
+
+    def after_architect(state: AgentState):
+        if route_architect(state) == "finalizer":
+            return "finalizer"
+        return route_plan(state, fanout)
+
+    def after_triage(state: AgentState):
+        if route_triage(state) == "coder" and state.get("plan"):
+            return route_plan(state, fanout)
+        return route_triage(state)
+
+    workflow = StateGraph(AgentState)
+
+    def add_node(name, fn):
+        workflow.add_node(name, profiled(name, fn) if profile else fn)
+
+    # Add Nodes
+    if speculative == "off":
+        add_node("bouncer", validate_scope)
+        add_node("optimizer", optimize_prompt_node)
+    else:
+        add_node("triage", make_speculative_triage(include_architect=speculative == "architect"))
+    add_node("architect", generate_spec)
+    add_node("coder", coder_node)
+    add_node("debugger", debugger_node)
+    add_node("finalizer", finalizer_node)
+    if fanout:
+        add_node("step_coder", coder_step_node)
+        add_node("join", join_steps_node)
+
+    # Add Edges (The Flow)
+    if speculative == "off":
+        workflow.set_entry_point("bouncer")
+
+        # Bouncer -> Optimizer (or Architect if reset) OR End
+        workflow.add_conditional_edges(
+            "bouncer",
+            route_bouncer,
+            {
+                "optimizer": "optimizer",
+                "architect": "architect",
+                END: END
+            }
+        )
+
+        # Optimizer -> Architect OR Coder
+        workflow.add_conditional_edges(
+            "optimizer",
+            route_optimizer,
+            {
+                "architect": "architect",
+                "coder": "coder"
+            }
+        )
+    else:
+        workflow.set_entry_point("triage")
+
+        # Triage -> Architect (if not run speculatively) OR Coder (or step coders) OR End
+        workflow.add_conditional_edges(
+            "triage",
+            after_triage,
+            ["architect", "coder", "step_coder", END] if fanout else ["architect", "coder", END]
+        )
+
+    # Architect -> Coder (or step coders) OR Finalizer (NEW: can skip dev loop for resets)
+    workflow.add_conditional_edges(
+        "architect",
+        after_architect,
+        ["coder", "step_coder", "finalizer"] if fanout else ["coder", "finalizer"]
+    )
+
+    if fanout:
+        # Step coders -> Join -> next wave OR Debugger
+        workflow.add_edge("step_coder", "join")
+        workflow.add_conditional_edges("join", route_join, ["step_coder", "debugger"])
+
+    # Coder -> Debugger (Always)
+    workflow.add_edge("coder", "debugger")
+
+    # Debugger -> Finalizer OR Coder (Loop)
+    workflow.add_conditional_edges(
+        "debugger",
+        route_debugger,
+        {
+            "finalizer": "finalizer",
+            "coder": "coder"
+        }
+    )
 
-# Debugger -> Finalizer OR Coder (Loop)
-workflow.add_conditional_edges(
-    "debugger",
-    route_debugger,
-    {
-        "finalizer": "finalizer",
-        "coder": "coder"
-    }
-)
+    # Finalizer -> End
+    workflow.add_edge("finalizer", END)
 
-# Finalizer -> End
-workflow.add_edge("finalizer", END)
+    return workflow.compile()
 
 # --- 3. COMPILE & RUN ---
 
-app = workflow.compile()
+app = build_app()
+
+def new_run_state(request: str) -> dict:
+    """Initial graph state for a single user request."""
+    return {
+        "request": request,
+        "dev_iterations": 0,
+        "debug_history": [],
+        "messages": []
+    }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interactive coding agent.")
+    parser.add_argument("--profile", type=Path, default=None, metavar="DIR",
+                        help="Profile every node (cProfile + tracemalloc) and write per-run artifacts to DIR")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the graph, ignoring cached runs")
+    parser.add_argument("--clear-cache", action="store_true", help="Drop every cached run before starting")
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        print(f"🗑️ Cleared {clear_run_cache()} cached run(s)")
+
+    if args.profile:
+        app = build_app(profile=True)
+
     print("🤖 CODING AGENT INITIALIZED")
     
     # Simple loop to keep the agent running for multiple requests
@@ -121,17 +221,19 @@ if __name__ == "__main__":
         if user_input.lower() in ["exit", "quit"]:
             break
             
-        initial_state = {
-            "request": user_input,
-            "dev_iterations": 0,
-            "debug_history": [],
-            "messages": []
-        }
+        initial_state = new_run_state(user_input)
+
+        def run_graph() -> dict:
+            final_state = {}
+            for event in app.stream(initial_state):
+                # stream() yields dictionaries with node names as keys
+                for node_name, state_update in event.items():
+                    # We already print inside the nodes, so we only keep the state
+                    final_state.update(state_update or {})
+            return final_state
         
-        # Run the graph
-        for event in app.stream(initial_state):
-            # stream() yields dictionaries with node names as keys
-            for node_name, state_update in event.items():
-                # We already print inside the nodes, so we can stay silent here
-                # or print a separator
-                pass
\ No newline at end of file
+        # Run the graph (profiled into its own folder if requested), or replay an identical earlier run
+        with profile_run(args.profile / time.strftime("run-%Y%m%d-%H%M%S")) if args.profile else nullcontext():
+            final_state, cache_status = cached_run(user_input, run_graph, bypass=args.no_cache)
+        if cache_status == "hit":
+            print(final_state.get("final_summary") or final_state.get("rejection_reason") or "Done.")
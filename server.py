@@ -0,0 +1,182 @@
+"""
+Local job-queue HTTP service.
+
+Requests are queued in a persistent store (agent/jobs.py) and run by a pool of graph
+workers, so clients (app.py) never block on a run.
+
+    POST /jobs                   {"request": "...", "workspace": "name"?, "no_cache": bool?} -> job
+    GET  /jobs                   recent jobs
+    GET  /jobs/<id>              status (+ result once done)
+    GET  /jobs/<id>/events       node events as NDJSON; ?after=<seq>, ?follow=0 to not wait for more
+    GET  /health
+
+Usage:
+    python server.py --workers 4
+"""
+import argparse
+import json
+import re
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+# Load environment before importing the graph
+load_dotenv()
+
+from main import build_app, new_run_state
+from agent import config
+from agent.jobs import TERMINAL, JobRunner, JobStore
+
+MAX_BODY_BYTES = 1 << 20
+WORKSPACE_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}$")
+# How often a followed event stream checks the job again when nothing is published; each
+# quiet interval also sends a {"keepalive": true} line so clients' read timeouts don't fire
+FOLLOW_POLL_SECONDS = 15.0
+
+class JobHandler(BaseHTTPRequestHandler):
+    store: JobStore = None  # Set by serve()
+    server_version = "CodingAgent/1.0"
+
+    # --- helpers ---
+
+    def _send_json(self, payload, status: HTTPStatus = HTTPStatus.OK):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: HTTPStatus, message: str):
+        self._send_json({"error": message}, status)
+
+    def _read_json(self) -> dict | None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._error(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+            return None
+        if not isinstance(body, dict):
+            self._error(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+            return None
+        return body
+
+    def log_message(self, format, *args):
+        pass  # Workers already print progress; per-request access logs are just noise
+
+    # --- routes ---
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._error(HTTPStatus.NOT_FOUND, "Not found")
+        body = self._read_json()
+        if body is None:
+            return
+
+        request = body.get("request")
+        if not isinstance(request, str) or not request.strip():
+            return self._error(HTTPStatus.BAD_REQUEST, "'request' is required")
+        workspace = body.get("workspace") or ""
+        if workspace and not (isinstance(workspace, str) and WORKSPACE_NAME.match(workspace) and ".." not in workspace):
+            return self._error(HTTPStatus.BAD_REQUEST, "'workspace' must be a simple name")
+
+        job = self.store.submit(request, workspace, bool(body.get("no_cache")))
+        self._send_json(job, HTTPStatus.ACCEPTED)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+
+        if parts == ["health"]:
+            return self._send_json({"status": "ok"})
+        if parts == ["jobs"]:
+            return self._send_json({"jobs": self.store.recent()})
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = self.store.get(parts[1])
+            if job is None:
+                return self._error(HTTPStatus.NOT_FOUND, f"No job {parts[1]}")
+            if len(parts) == 2:
+                return self._send_json(job)
+            if parts[2:] == ["events"]:
+                try:
+                    after = int(query.get("after", ["0"])[0])
+                except ValueError:
+                    return self._error(HTTPStatus.BAD_REQUEST, "'after' must be an integer")
+                follow = query.get("follow", ["1"])[0] not in ("0", "false", "no")
+                return self._stream_events(job["id"], after, follow)
+        self._error(HTTPStatus.NOT_FOUND, "Not found")
+
+    def _stream_events(self, job_id: str, after: int, follow: bool):
+        """
+        One JSON object per line: {"seq", "ts", "node", "update"} per graph step, then a
+        final {"job": ...} line once the job is finished (or right away with follow=0).
+        While a long node runs, {"keepalive": true} lines are sent every FOLLOW_POLL_SECONDS.
+        """
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            seen = self.store.version
+            last_write = time.monotonic()
+            while True:
+                # Read the status first: if it's terminal, every event is already stored
+                job = self.store.get(job_id)
+                for event in self.store.events(job_id, after):
+                    self.wfile.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+                    after = event["seq"]
+                    last_write = time.monotonic()
+                if job["status"] in TERMINAL or not follow:
+                    self.wfile.write((json.dumps({"job": job}, default=str) + "\n").encode("utf-8"))
+                    return
+                # Other jobs' events wake us up too, so go by the time since this stream last wrote
+                if time.monotonic() - last_write >= FOLLOW_POLL_SECONDS:
+                    self.wfile.write(b'{"keepalive": true}\n')
+                    last_write = time.monotonic()
+                self.wfile.flush()
+                seen = self.store.wait(seen, max(0.0, FOLLOW_POLL_SECONDS - (time.monotonic() - last_write)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away; the job keeps running
+
+def serve(host: str, port: int, workers: int, graph, store: JobStore):
+    JobHandler.store = store
+    runner = JobRunner(graph, store, new_run_state, workers)
+    runner.start()
+
+    httpd = ThreadingHTTPServer((host, port), JobHandler)
+    httpd.daemon_threads = True
+    print(f"🤖 JOB SERVICE on http://{host}:{port} ({workers} worker(s), store: {store.path})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n   > Shutting down (running jobs are requeued on next start if interrupted)")
+    finally:
+        httpd.server_close()
+        runner.stop(timeout=0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the coding agent as a local job queue.")
+    parser.add_argument("--host", default=config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=config.SERVICE_WORKERS,
+                        help="Graph workers (jobs on the same workspace still run one at a time)")
+    parser.add_argument("--db", default=config.JOBS_DB, help="SQLite file holding jobs and events")
+    parser.add_argument("--speculative", choices=config.SPECULATIVE_MODES, default=config.SPECULATIVE_MODE,
+                        help="Run the Optimizer (and Architect) alongside the Bouncer")
+    parser.add_argument("--fanout", action="store_true", default=config.PLAN_FANOUT,
+                        help="Send independent plan steps to parallel Coder workers")
+    args = parser.parse_args()
+
+    graph = build_app(speculative=args.speculative, fanout=args.fanout)
+    serve(args.host, args.port, max(1, args.workers), graph, JobStore(args.db))
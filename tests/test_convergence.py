@@ -0,0 +1,28 @@
+from agent.convergence import assess_progress, fingerprint
+
+def _run_log(elapsed: str, rss_mb: str) -> str:
+    return ("\n--- EXECUTION OF test_app.py ---\nEXIT CODE: 1\n"
+            f"ELAPSED: {elapsed}s | OUTPUT: 0 bytes stdout, 0 bytes stderr\n"
+            f"RESOURCES: 0.02s CPU, {rss_mb} MB peak RSS\n"
+            "STDOUT:\n\nSTDERR:\n\n")
+
+def test_fingerprint_ignores_run_stats_for_exit_code_only_failures():
+    first = fingerprint(_run_log("0.031", "9.6"), ["app.py"])
+    second = fingerprint(_run_log("0.047", "9.8"), ["app.py"])
+    assert first == second
+
+def test_fingerprint_still_tells_different_failures_apart():
+    assert fingerprint(_run_log("0.03", "9.6"), ["app.py"]) != fingerprint(
+        _run_log("0.03", "9.6").replace("EXIT CODE: 1", "EXIT CODE: 2"), ["app.py"])
+
+def _rounds(*scores):
+    # Distinct fingerprints so only the scores decide
+    return [{"role": "debugger", "fingerprint": f"fp{i}", "score": score} for i, score in enumerate(scores)]
+
+def test_one_lower_round_is_not_improving():
+    assert assess_progress(_rounds(5, 3)) == "unknown"
+    assert assess_progress(_rounds(3, 5, 4)) == "unknown"
+
+def test_two_consecutive_decreases_are_improving():
+    assert assess_progress(_rounds(5, 3, 2)) == "improving"
+    assert assess_progress(_rounds(9, 5, 3, 2)) == "improving"
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from agent import model
+from agent.model import pick_tier, resolve_model_settings
+
+@pytest.fixture(autouse=True)
+def default_model_config(monkeypatch):
+    monkeypatch.delenv("AGENT_MODEL_CONFIG", raising=False)
+
+def test_per_node_settings_override_the_default():
+    assert resolve_model_settings("optimizer")["max_tokens"] == 16
+    assert resolve_model_settings("bouncer")["max_tokens"] == 200
+    assert resolve_model_settings("coder")["model"] == model.DEFAULT_MODEL_CONFIG["default"]["model"]
+    assert resolve_model_settings("coder", "strong")["model"] == model.DEFAULT_MODEL_CONFIG["tiers"]["strong"]["model"]
+
+def test_coder_escalates_only_after_a_failed_round_or_when_asked():
+    assert pick_tier("coder", {"debug_history": []}) == "default"
+    approved = {"debug_history": [{"role": "coder"}, {"role": "debugger", "status": "approved"}]}
+    assert pick_tier("coder", approved) == "default"
+
+    failed = {"debug_history": [{"role": "coder"}, {"role": "debugger", "status": "rejected"}]}
+    assert pick_tier("coder", failed) == "strong"
+    assert pick_tier("coder", {"debug_history": [], "escalate": True}) == "strong"
+    # Only nodes listed in the escalation policy ever escalate
+    assert pick_tier("architect", failed) == "default"
+
+def test_fake_provider_from_config_file(tmp_path, monkeypatch):
+    pytest.importorskip("langchain_core")
+    config_path = tmp_path / "models.json"
+    config_path.write_text(json.dumps({
+        "default": {"provider": "fake", "responses": ["<APPROVED />"]},
+        "nodes": {"debugger": {"responses": ["needs work"]}}
+    }), encoding="utf-8")
+    monkeypatch.setenv("AGENT_MODEL_CONFIG", str(config_path))
+
+    assert resolve_model_settings("debugger")["max_tokens"] == 1024
+    assert model.get_model("debugger").invoke("check this").content == "needs work"
+    assert model.get_model("bouncer").invoke("hi").content == "<APPROVED />"
@@ -0,0 +1,18 @@
+import cProfile
+import pstats
+
+from agent.profiling import categorize
+from agent.scheduler import ModelScheduler
+
+def test_scheduler_rate_limit_wait_is_model_wait_not_local():
+    scheduler = ModelScheduler(requests_per_minute=600, tokens_per_minute=10**9, max_concurrency=1)
+    scheduler.requests.take(600)  # Empty bucket: the next call waits ~0.1s for a refill
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    scheduler.call(lambda: "ok", estimated_tokens=1)
+    profiler.disable()
+
+    seconds = categorize(pstats.Stats(profiler))
+    assert seconds["model_wait"] >= 0.05
+    assert seconds["local"] < seconds["model_wait"]
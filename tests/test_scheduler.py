@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from agent import scheduler as scheduler_module
+from agent.scheduler import BATCH, INTERACTIVE, ModelScheduler, TokenBucket
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+class RateLimited(Exception):
+    """Shaped like the provider SDKs' 429 errors: status_code + response.headers."""
+
+    def __init__(self, retry_after="2"):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = FakeResponse({"retry-after": retry_after})
+
+class BadRequest(Exception):
+    status_code = 400
+
+class FakeEndpoint:
+    """Fails the first `failures` calls with a 429, then answers."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimited()
+        return "ok"
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(scheduler_module.time, "sleep", recorded.append)
+    return recorded
+
+def make_scheduler(**overrides) -> ModelScheduler:
+    settings = dict(requests_per_minute=10**6, tokens_per_minute=10**9, max_concurrency=1,
+                    max_retries=3, base_delay=0.01, max_delay=0.05)
+    settings.update(overrides)
+    return ModelScheduler(**settings)
+
+def test_retries_429_and_honours_retry_after(sleeps):
+    endpoint = FakeEndpoint(failures=2)
+    assert make_scheduler().call(endpoint, estimated_tokens=10) == "ok"
+    assert endpoint.calls == 3
+    # Jittered backoff is capped at 0.05s here, so Retry-After (2s) must win every time
+    assert sleeps == [2.0, 2.0]
+
+def test_gives_up_after_max_retries(sleeps):
+    endpoint = FakeEndpoint(failures=10)
+    with pytest.raises(RateLimited):
+        make_scheduler(max_retries=2).call(endpoint, estimated_tokens=10)
+    assert endpoint.calls == 3
+    assert len(sleeps) == 2
+
+def test_does_not_retry_client_errors(sleeps):
+    calls = []
+
+    def endpoint():
+        calls.append(1)
+        raise BadRequest()
+
+    with pytest.raises(BadRequest):
+        make_scheduler().call(endpoint, estimated_tokens=10)
+    assert len(calls) == 1
+    assert sleeps == []
+
+def test_backoff_without_retry_after_stays_within_cap():
+    scheduler = make_scheduler(base_delay=1.0, max_delay=4.0)
+    error = RateLimited(retry_after=None)
+    for attempt in range(6):
+        assert 0.0 <= scheduler.backoff(attempt, error) <= 4.0
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)  # 1 unit per second
+    assert bucket.wait_time(60) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+    # Asking for more than the bucket holds waits for a full bucket, not forever
+    assert bucket.wait_time(1000) == pytest.approx(60.0, abs=0.1)
+
+def test_interactive_calls_run_before_queued_batch_calls():
+    scheduler = make_scheduler(max_concurrency=1)
+    release = threading.Event()
+    order = []
+
+    def blocker():
+        release.wait(5)
+        return "done"
+
+    def record(name):
+        def fn():
+            order.append(name)
+            return name
+        return fn
+
+    holder = threading.Thread(target=scheduler.call, args=(blocker, 1, INTERACTIVE))
+    holder.start()
+    while scheduler._active == 0:
+        time.sleep(0.001)
+
+    # Batch call queues first, interactive second; both wait for the single slot
+    waiters = [
+        threading.Thread(target=scheduler.call, args=(record("batch"), 1, BATCH)),
+        threading.Thread(target=scheduler.call, args=(record("interactive"), 1, INTERACTIVE)),
+    ]
+    for waiter in waiters:
+        waiter.start()
+        while len(scheduler._queue) < waiters.index(waiter) + 1:
+            time.sleep(0.001)
+
+    release.set()
+    for thread in [holder] + waiters:
+        thread.join(5)
+    assert order == ["interactive", "batch"]
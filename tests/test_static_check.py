@@ -0,0 +1,40 @@
+from agent.static_check import static_check
+
+def test_package_init_relative_imports_resolve():
+    sources = {
+        "shapes/__init__.py": "from .circle import area\nfrom . import square\n",
+        "shapes/circle.py": "def area(r):\n    return 3.14159 * r * r\n",
+        "shapes/square.py": "from .circle import area\n\ndef side_area(s):\n    return s * s\n",
+        "test_shapes.py": "from shapes import area\nassert area(1) > 3\n",
+    }
+    assert static_check(sources) == []
+
+def test_relative_import_of_missing_name_is_reported():
+    sources = {
+        "shapes/__init__.py": "from .circle import perimeter\n",
+        "shapes/circle.py": "def area(r):\n    return r\n",
+    }
+    assert static_check(sources) == ["shapes/__init__.py:1: 'perimeter' is not defined in shapes/circle.py"]
+
+def test_module_dunders_are_defined_on_workspace_modules():
+    sources = {
+        "utils.py": "def helper():\n    return 1\n",
+        "main.py": "import utils\nfrom utils import __doc__\nprint(utils.__name__, utils.__file__, __doc__)\n",
+    }
+    assert static_check(sources) == []
+
+def test_walrus_in_comprehension_binds_in_enclosing_scope():
+    sources = {
+        "main.py": (
+            "print([y for x in [1] if (y := x)])\nprint(y)\n"
+            "def f():\n    [z for x in [1] if (z := x)]\n    return z\n"
+        ),
+    }
+    assert static_check(sources) == []
+
+def test_global_declaration_in_function_defines_module_name():
+    sources = {
+        "main.py": "def setup():\n    global CONFIG\n    CONFIG = {}\n\nsetup()\nprint(CONFIG)\n",
+        "app.py": "import main\nprint(main.CONFIG)\n",
+    }
+    assert static_check(sources) == []